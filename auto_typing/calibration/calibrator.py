@@ -1,15 +1,83 @@
 import cv2
 import numpy as np
 import glob
+import hashlib
 import argparse
 from pathlib import Path
+from concurrent.futures import ProcessPoolExecutor
 from auto_typing.utils.config import load_config, ROOT_DIR
 
-def calibrate_camera(config):
-    pattern_size = tuple(config['calibration']['pattern_size'])
-    square_size = config['calibration']['square_size']
-    image_dir = ROOT_DIR / config['calibration']['calibration_image_dir']
-    output_file = ROOT_DIR / config['calibration']['output_file']
+CORNER_CRITERIA = (cv2.TERM_CRITERIA_EPS + cv2.TERM_CRITERIA_MAX_ITER, 30, 0.001)
+
+def file_hash(path):
+    digest = hashlib.sha1()
+    with open(path, 'rb') as f:
+        for chunk in iter(lambda: f.read(1 << 20), b''):
+            digest.update(chunk)
+    return digest.hexdigest()
+
+def detect_corners(fname, pattern_size, max_dim=640):
+    # Coarse search on a downscaled copy, then sub-pixel refinement on the full-resolution image
+    gray = cv2.imread(str(fname), cv2.IMREAD_GRAYSCALE)
+    if gray is None:
+        return False, None, None
+    image_size = gray.shape[::-1]
+    scale = min(1.0, max_dim / max(image_size)) if max_dim else 1.0
+    small = cv2.resize(gray, None, fx=scale, fy=scale, interpolation=cv2.INTER_AREA) if scale < 1.0 else gray
+    flags = cv2.CALIB_CB_ADAPTIVE_THRESH + cv2.CALIB_CB_NORMALIZE_IMAGE + cv2.CALIB_CB_FAST_CHECK
+    ret, corners = cv2.findChessboardCorners(small, pattern_size, flags)
+    if not ret:
+        return False, None, image_size
+    corners = corners / scale
+    # Search window covers the upscaling error plus the usual few pixels
+    win = max(5, int(np.ceil(1.5 / scale)))
+    corners = cv2.cornerSubPix(gray, corners.astype(np.float32), (win, win), (-1, -1), CORNER_CRITERIA)
+    return True, corners, image_size
+
+def corner_cache_file(cache_dir, digest, pattern_size, max_dim):
+    return Path(cache_dir) / f"{digest}_{pattern_size[0]}x{pattern_size[1]}_{max_dim}.npz"
+
+def _detect_cached(args):
+    fname, digest, pattern_size, max_dim, cache_dir = args
+    found, corners, image_size = detect_corners(fname, pattern_size, max_dim)
+    if cache_dir is not None and image_size is not None:
+        np.savez(corner_cache_file(cache_dir, digest, pattern_size, max_dim), found=found,
+                 corners=np.empty((0, 1, 2), np.float32) if corners is None else corners,
+                 image_size=np.array(image_size))
+    return fname, found, corners, image_size
+
+def find_all_corners(images, pattern_size, max_dim=640, cache_dir=None, workers=None):
+    # Returns {fname: (found, corners, image_size)}; only images without a cached result are processed
+    results, jobs = {}, []
+    if cache_dir is not None:
+        Path(cache_dir).mkdir(parents=True, exist_ok=True)
+    for fname in images:
+        digest = file_hash(fname)
+        cached = None if cache_dir is None else corner_cache_file(cache_dir, digest, pattern_size, max_dim)
+        if cached is not None and cached.exists():
+            data = np.load(cached)
+            results[fname] = (bool(data['found']), data['corners'] if data['found'] else None,
+                              tuple(int(v) for v in data['image_size']))
+        else:
+            jobs.append((fname, digest, pattern_size, max_dim, cache_dir))
+
+    if workers == 1 or len(jobs) <= 1:
+        detected = [_detect_cached(job) for job in jobs]
+    else:
+        with ProcessPoolExecutor(max_workers=workers) as pool:
+            detected = list(pool.map(_detect_cached, jobs))
+    for fname, found, corners, image_size in detected:
+        results[fname] = (found, corners, image_size)
+    return results, len(jobs)
+
+def calibrate_camera(config, headless=False, workers=None):
+    calib_cfg = config['calibration']
+    pattern_size = tuple(calib_cfg['pattern_size'])
+    square_size = calib_cfg['square_size']
+    image_dir = ROOT_DIR / calib_cfg['calibration_image_dir']
+    output_file = ROOT_DIR / calib_cfg['output_file']
+    cache_dir = calib_cfg.get('corner_cache_dir')
+    cache_dir = None if cache_dir is None else ROOT_DIR / cache_dir
 
     # Prepare object points
     objp = np.zeros((pattern_size[0]*pattern_size[1], 3), np.float32)
@@ -19,37 +87,43 @@ def calibrate_camera(config):
     objpoints = []
     imgpoints = []
 
-    images = glob.glob(str(image_dir / '*.jpg'))
+    images = sorted(glob.glob(str(image_dir / '*.jpg')))
+    detections, processed = find_all_corners(images, pattern_size, calib_cfg.get('detect_max_dim', 640),
+                                             cache_dir, workers)
+    print(f"🔍 Detected corners in {processed} new image(s), {len(images) - processed} from cache.")
 
+    image_size = None
     for fname in images:
-        img = cv2.imread(fname)
-        if img is None:
+        ret, corners, size = detections[fname]
+        if not ret:
             continue
-        gray = cv2.cvtColor(img, cv2.COLOR_BGR2GRAY)
-
-        ret, corners = cv2.findChessboardCorners(gray, pattern_size, None)
-
-        if ret:
-            objpoints.append(objp)
-            imgpoints.append(corners)
+        if image_size is not None and size != image_size:
+            print(f"⚠️ Skipping {Path(fname).name}: size {size} differs from {image_size}")
+            continue
+        image_size = size
+        objpoints.append(objp)
+        imgpoints.append(corners)
+        if not headless:
+            img = cv2.imread(fname)
             cv2.drawChessboardCorners(img, pattern_size, corners, ret)
             cv2.imshow('Checkerboard Detection', img)
             cv2.waitKey(500)
 
-    cv2.destroyAllWindows()
+    if not headless:
+        cv2.destroyAllWindows()
 
     if not objpoints:
         print("❌ No valid checkerboard detections found.")
         return
 
     ret, mtx, dist, rvecs, tvecs = cv2.calibrateCamera(
-        objpoints, imgpoints, gray.shape[::-1], None, None)
+        objpoints, imgpoints, image_size, None, None)
 
     if ret:
-        print("✅ Calibration successful.")
+        print(f"✅ Calibration successful ({len(objpoints)} views, RMS {ret:.3f} px).")
         print("Camera matrix:")
         print(mtx)
-        np.savez(output_file, camera_matrix=mtx, dist_coeffs=dist)
+        np.savez(output_file, camera_matrix=mtx, dist_coeffs=dist, image_size=np.array(image_size))
         print(f"🔽 Calibration saved to: {output_file}")
     else:
         print("❌ Calibration failed.")
@@ -57,7 +131,9 @@ def calibrate_camera(config):
 if __name__ == "__main__":
     parser = argparse.ArgumentParser(description='Camera calibration with YAML config.')
     parser.add_argument('--config', type=str, default='config.yaml', help='Path to YAML config file')
+    parser.add_argument('--headless', action='store_true', help='Skip the detection preview windows')
+    parser.add_argument('--workers', type=int, default=None, help='Corner detection processes (1 = in-process)')
     args = parser.parse_args()
 
     config = load_config(args.config)
-    calibrate_camera(config)
+    calibrate_camera(config, headless=args.headless, workers=args.workers)
@@ -0,0 +1,91 @@
+import cv2
+import hashlib
+import numpy as np
+from pathlib import Path
+from auto_typing.utils.config import ROOT_DIR
+
+class CameraModel:
+    _loaded = {}
+
+    def __init__(self, camera_matrix, dist_coeffs=None, image_size=None, cache_dir=None):
+        self.camera_matrix = np.asarray(camera_matrix, np.float64)
+        self.dist_coeffs = np.zeros((1, 5)) if dist_coeffs is None else np.asarray(dist_coeffs, np.float64).reshape(1, -1)
+        # (width, height) the intrinsics were calibrated at; None means "whatever size we are given"
+        self.image_size = None if image_size is None else tuple(int(v) for v in image_size)
+        self.cache_dir = None if cache_dir is None else Path(cache_dir)
+        self._maps = {}
+
+    @classmethod
+    def load(cls, path, cache_dir=None):
+        # One parse per calibration file per process; every caller shares the same maps
+        path = Path(path)
+        key = (path.resolve(), None if cache_dir is None else Path(cache_dir).resolve())
+        if key not in cls._loaded:
+            if not path.exists():
+                raise FileNotFoundError(f"Camera intrinsics file not found at: {path}")
+            data = np.load(path)
+            image_size = data['image_size'] if 'image_size' in data else None
+            dist = data['dist_coeffs'] if 'dist_coeffs' in data else None
+            cls._loaded[key] = cls(data['camera_matrix'], dist, image_size, cache_dir)
+        return cls._loaded[key]
+
+    @classmethod
+    def from_config(cls, config, image_size=(640, 480)):
+        calibration = config.get('calibration', {})
+        cache_dir = calibration.get('map_cache_dir')
+        cache_dir = None if cache_dir is None else ROOT_DIR / cache_dir
+        if calibration.get('load_from_file', False):
+            return cls.load(ROOT_DIR / calibration['output_file'], cache_dir)
+        # Fallback: pinhole camera with the configured focal length, principal point at the image center
+        f = config['depth']['focal_length']
+        w, h = image_size
+        return cls(np.array([[f, 0, w / 2], [0, f, h / 2], [0, 0, 1]], np.float64), None, None, cache_dir)
+
+    @property
+    def is_distorted(self):
+        return bool(np.any(self.dist_coeffs))
+
+    @property
+    def calibration_hash(self):
+        digest = hashlib.sha1()
+        for array in (self.camera_matrix, self.dist_coeffs):
+            digest.update(np.ascontiguousarray(array, np.float64).tobytes())
+        return digest.hexdigest()[:16]
+
+    def intrinsics(self, image_size=None):
+        # Camera matrix for frames of image_size (width, height), scaled from the calibration resolution
+        if image_size is None or self.image_size is None or tuple(image_size) == self.image_size:
+            return self.camera_matrix
+        sx = image_size[0] / self.image_size[0]
+        sy = image_size[1] / self.image_size[1]
+        return np.diag([sx, sy, 1.0]) @ self.camera_matrix
+
+    def maps(self, image_size):
+        image_size = tuple(int(v) for v in image_size)
+        if image_size in self._maps:
+            return self._maps[image_size]
+
+        cache_file = None
+        if self.cache_dir is not None:
+            cache_file = self.cache_dir / f"undistort_{self.calibration_hash}_{image_size[0]}x{image_size[1]}.npz"
+            if cache_file.exists():
+                data = np.load(cache_file)
+                self._maps[image_size] = (data['map1'], data['map2'])
+                return self._maps[image_size]
+
+        # Fixed-point maps (CV_16SC2 + interpolation table) make remap about twice as fast as float maps
+        K = self.intrinsics(image_size)
+        map1, map2 = cv2.initUndistortRectifyMap(K, self.dist_coeffs, None, K, image_size, cv2.CV_16SC2)
+        if cache_file is not None:
+            cache_file.parent.mkdir(parents=True, exist_ok=True)
+            np.savez(cache_file, map1=map1, map2=map2)
+        self._maps[image_size] = (map1, map2)
+        return self._maps[image_size]
+
+    def undistort(self, image, out=None):
+        # Same result as cv2.undistort(image, K, dist) but reuses the maps; pass out to reuse an output buffer too
+        if not self.is_distorted:
+            return image
+        h, w = image.shape[:2]
+        map1, map2 = self.maps((w, h))
+        return cv2.remap(image, map1, map2, cv2.INTER_LINEAR, dst=out)
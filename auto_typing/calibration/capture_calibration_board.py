@@ -3,6 +3,7 @@ import cv2
 import argparse
 from pathlib import Path
 from auto_typing.utils.config import load_config, ROOT_DIR
+from auto_typing.utils.frame_source import FrameSource
 
 def get_next_filename(calib_dir):
     existing = sorted([f.name for f in calib_dir.glob('calib*.jpg')])
@@ -17,16 +18,21 @@ def capture_calibration_images(config):
     calib_dir = ROOT_DIR / config['calibration']['calibration_image_dir']
     calib_dir.mkdir(parents=True, exist_ok=True)
 
-    cap = cv2.VideoCapture(0)
-    if not cap.isOpened():
+    try:
+        source = FrameSource.from_config(config).start()
+    except RuntimeError:
         print("❌ Failed to open camera.")
         return
 
     print("📷 Camera open. Press SPACE to capture a calibration image. ESC to exit.")
 
     while True:
-        ret, frame = cap.read()
-        if not ret:
+        try:
+            frame, _, _ = source.read()
+        except TimeoutError:
+            print("⚠️ No frame from camera yet, retrying.")
+            continue
+        if frame is None:
             print("❌ Failed to grab frame.")
             break
 
@@ -42,7 +48,7 @@ def capture_calibration_images(config):
             print("🛑 Capture ended.")
             break
 
-    cap.release()
+    source.stop()
     cv2.destroyAllWindows()
 
 if __name__ == "__main__":
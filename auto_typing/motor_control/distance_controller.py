@@ -1,26 +1,29 @@
 
 from auto_typing.motor_control import motor_cpp
 from auto_typing.motor_control.motion_model import MotorMotionModel
-from auto_typing.utils.timing import run_for_duration
 
 class DistanceMotorController:
-    def __init__(self, channel=2, default_feedforward=50):
+    def __init__(self, channel=2, default_feedforward=50, model=None):
         self.controller = motor_cpp.MotorController(channel)
         self.controller.init()
-        self.model = MotorMotionModel()
+        self.model = MotorMotionModel.load() if model is None else model
         self.feedforward = default_feedforward  # ms
 
-    def move(self, direction: str, distance_mm: float, duty=1.0, rate_hz=20):
+    def move(self, direction: str, distance_mm: float, duty=1.0, rate_hz=200, blocking=True, ramp_s=0.0):
         if direction not in ('left', 'right'):
             raise ValueError("Direction must be 'left' or 'right'")
 
         # Adjust duty sign based on convention
         duty = -abs(duty) if direction == 'left' else abs(duty)
 
-        duration = self.model.estimate_time_to_travel(direction, distance_mm)
+        duration = self.model.estimate_time_to_travel(direction, distance_mm, duty=duty)
         print(f"🔁 Moving {direction} for {duration:.2f} seconds to cover ~{distance_mm}mm")
 
-        def command():
-            self.controller.run(duty, self.feedforward)
+        # Feed/enable loop runs on a native thread; the handle lets vision work continue meanwhile
+        handle = self.controller.start_move(duty, duration, rate_hz=rate_hz, feed_ms=self.feedforward, ramp_s=ramp_s)
+        if blocking:
+            handle.wait()
+        return handle
 
-        run_for_duration(duration, command, rate_hz=rate_hz)
+    def stop(self):
+        self.controller.stop()
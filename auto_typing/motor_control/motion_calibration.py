@@ -0,0 +1,169 @@
+import csv
+import time
+import argparse
+import numpy as np
+from pathlib import Path
+from auto_typing.utils.config import load_config, ROOT_DIR
+
+DIRECTIONS = ('left', 'right')
+DEFAULT_LOOKUP_TABLE = 'models/motion_lut.npz'
+
+def lookup_table_path(config):
+    path = Path(config.get('motion', {}).get('lookup_table', DEFAULT_LOOKUP_TABLE))
+    return path if path.is_absolute() else ROOT_DIR / path
+
+
+class MotionLog:
+    FIELDS = ('direction', 'duty', 'duration_s', 'displacement_mm')
+
+    def __init__(self, path):
+        self.path = Path(path)
+
+    def record(self, direction, duty, duration_s, displacement_mm):
+        if direction not in DIRECTIONS:
+            raise ValueError("Direction must be 'left' or 'right'")
+        new_file = not self.path.exists()
+        self.path.parent.mkdir(parents=True, exist_ok=True)
+        with self.path.open('a', newline='') as f:
+            writer = csv.writer(f)
+            if new_file:
+                writer.writerow(self.FIELDS)
+            writer.writerow([direction, f"{abs(duty):.3f}", f"{duration_s:.4f}", f"{abs(displacement_mm):.2f}"])
+
+    def load(self):
+        runs = {direction: [] for direction in DIRECTIONS}
+        with self.path.open('r', newline='') as f:
+            for row in csv.DictReader(f):
+                runs[row['direction']].append((float(row['duty']), float(row['duration_s']), float(row['displacement_mm'])))
+        return {direction: np.array(rows, np.float64).reshape(-1, 3) for direction, rows in runs.items()}
+
+
+def fit_duty_model(durations, displacements):
+    # displacement = velocity * max(t - dead_time, 0): a linear fit over moving runs gives both terms
+    moving = displacements > 0
+    t, d = durations[moving], displacements[moving]
+    if len(t) == 0:
+        raise ValueError("No runs with measurable displacement")
+    if len(t) == 1 or np.ptp(t) == 0:
+        return float(d.mean() / t.mean()), 0.0
+    velocity, intercept = np.polyfit(t, d, 1)
+    if velocity <= 0:
+        raise ValueError(f"Fitted velocity {velocity:.3f} mm/s is not positive; record runs with longer durations")
+    return float(velocity), float(max(-intercept / velocity, 0.0))
+
+
+def fit_motion_model(runs):
+    model = {}
+    for direction, data in runs.items():
+        if len(data) == 0:
+            continue
+        model[direction] = {}
+        for duty in np.unique(data[:, 0]):
+            sel = data[:, 0] == duty
+            model[direction][float(duty)] = fit_duty_model(data[sel, 1], data[sel, 2])
+    return model
+
+
+class MotionLookupTable:
+    def __init__(self, duties, durations, step_mm):
+        # duties[direction]: sorted (D,), durations[direction]: (D, N) seconds for 0, step, 2*step, ... mm
+        self.duties = duties
+        self.durations = durations
+        self.step_mm = step_mm
+
+    @classmethod
+    def from_model(cls, model, max_distance_mm=300.0, step_mm=0.5):
+        distances = np.arange(0.0, max_distance_mm + step_mm, step_mm)
+        duties, durations = {}, {}
+        for direction, per_duty in model.items():
+            duty_values = np.array(sorted(per_duty))
+            velocity = np.array([per_duty[d][0] for d in duty_values])
+            dead_time = np.array([per_duty[d][1] for d in duty_values])
+            # Column 0 keeps the dead time so short moves interpolate from it; duration() returns 0 only for d == 0
+            table = dead_time[:, None] + distances[None, :] / velocity[:, None]
+            duties[direction], durations[direction] = duty_values, table
+        return cls(duties, durations, step_mm)
+
+    @classmethod
+    def load(cls, path):
+        data = np.load(path)
+        duties = {d: data[f'{d}_duties'] for d in DIRECTIONS if f'{d}_duties' in data}
+        durations = {d: data[f'{d}_durations'] for d in duties}
+        return cls(duties, durations, float(data['step_mm']))
+
+    def save(self, path):
+        arrays = {'step_mm': np.array(self.step_mm)}
+        for direction in self.duties:
+            arrays[f'{direction}_duties'] = self.duties[direction]
+            arrays[f'{direction}_durations'] = self.durations[direction]
+        np.savez_compressed(path, **arrays)
+
+    def velocities(self, direction):
+        # Calibrated mm/s per duty row, from the slope of the duration table
+        return self.step_mm / (self.durations[direction][:, 1] - self.durations[direction][:, 0])
+
+    def duration(self, direction, distance_mm, duty=1.0):
+        if direction not in self.duties:
+            raise ValueError(f"No calibration data for direction '{direction}'")
+        duties, table = self.duties[direction], self.durations[direction]
+        distance_mm = abs(distance_mm)
+        if distance_mm <= 0:
+            return 0.0
+        # O(1): direct index into the uniform distance grid, linear in between (and beyond the last cell)
+        pos = distance_mm / self.step_mm
+        i = min(int(pos), table.shape[1] - 2)
+        frac = pos - i
+        duty = abs(duty)
+        if len(duties) == 1 or duty <= duties[0]:
+            lo = hi = 0
+        elif duty >= duties[-1]:
+            lo = hi = len(duties) - 1
+        else:
+            hi = int(np.searchsorted(duties, duty))
+            lo = hi - 1
+        w = 0.0 if lo == hi else (duty - duties[lo]) / (duties[hi] - duties[lo])
+        rows = table[[lo, hi]]
+        at_distance = rows[:, i] + frac * (rows[:, i + 1] - rows[:, i])
+        return float(at_distance[0] + w * (at_distance[1] - at_distance[0]))
+
+
+def record_runs(log, channel, duties, durations, directions, rate_hz=200):
+    from auto_typing.motor_control.distance_controller import DistanceMotorController
+    motor = DistanceMotorController(channel=channel)
+    for direction in directions:
+        for duty in duties:
+            for duration in durations:
+                input(f"➡️ Mark the carriage, then press ENTER to move {direction} at duty {duty} for {duration:.2f} s")
+                signed_duty = -abs(duty) if direction == 'left' else abs(duty)
+                motor.controller.start_move(signed_duty, duration, rate_hz=rate_hz, feed_ms=motor.feedforward).wait()
+                time.sleep(0.5)
+                displacement = float(input("📏 Measured displacement in mm: "))
+                log.record(direction, duty, duration, displacement)
+
+
+if __name__ == "__main__":
+    parser = argparse.ArgumentParser(description='Record motion runs and fit the motion lookup table')
+    parser.add_argument('--config', type=str, default='config.yaml')
+    parser.add_argument('--record', action='store_true', help='Drive the motor and record measured displacements')
+    parser.add_argument('--channel', type=int, default=2)
+    parser.add_argument('--duties', type=float, nargs='+', default=[0.5, 0.75, 1.0])
+    parser.add_argument('--durations', type=float, nargs='+', default=[0.5, 1.0, 2.0])
+    parser.add_argument('--directions', type=str, nargs='+', default=list(DIRECTIONS))
+    args = parser.parse_args()
+
+    config = load_config(args.config)
+    motion_cfg = config.get('motion', {})
+    log = MotionLog(ROOT_DIR / motion_cfg.get('calibration_log', 'models/motion_runs.csv'))
+    if args.record:
+        record_runs(log, args.channel, args.duties, args.durations, args.directions)
+
+    model = fit_motion_model(log.load())
+    for direction, per_duty in model.items():
+        for duty, (velocity, dead_time) in sorted(per_duty.items()):
+            print(f"✅ {direction:>5} duty {duty:.2f}: {velocity:.2f} mm/s after {dead_time * 1000:.0f} ms dead time")
+
+    table = MotionLookupTable.from_model(model, max_distance_mm=motion_cfg.get('max_distance_mm', 300.0),
+                                         step_mm=motion_cfg.get('step_mm', 0.5))
+    output = lookup_table_path(config)
+    table.save(output)
+    print(f"🔽 Lookup table saved to: {output}")
@@ -1,7 +1,12 @@
 
+import numpy as np
+from pathlib import Path
+from auto_typing.utils.config import load_config
+from auto_typing.motor_control.motion_calibration import MotionLookupTable, lookup_table_path
+
 class MotorMotionModel:
-    def __init__(self):
-        # Parameters derived from data (in mm/s)
+    def __init__(self, lookup_table=None):
+        # Parameters derived from data (in mm/s), used until a calibrated lookup table exists
         self.models = {
             'left': {
                 'slope': 2.523876556578235,
@@ -12,15 +17,60 @@ class MotorMotionModel:
                 'intercept': 35.807557344064385
             }
         }
+        self.lookup_table = lookup_table
+
+    @classmethod
+    def load(cls, path=None):
+        # Calibrated table if one has been recorded (see motion_calibration), else the legacy constants
+        path = lookup_table_path(load_config('config.yaml')) if path is None else Path(path)
+        return cls(MotionLookupTable.load(path) if path.exists() else None)
+
+    @classmethod
+    def from_config(cls, config):
+        return cls.load(lookup_table_path(config))
 
     def estimate_position(self, direction, time_sec):
         model = self.models[direction]
         return model['slope'] * time_sec + model['intercept']
 
-    def estimate_time_to_travel(self, direction, distance_mm):
+    def duty_for_velocity(self, velocity_mm_s, max_velocity_mm_s):
+        # Signed duty for signed axis velocities (positive = 'left', which takes a negative duty). Inverts the
+        # calibrated duty -> velocity curve per direction, linear down to zero below the slowest calibrated duty;
+        # the legacy constants only describe full duty, so without a table duty scales with max_velocity_mm_s
+        velocity = np.asarray(velocity_mm_s, dtype=np.float64)
+        if self.lookup_table is None:
+            return -np.clip(velocity / max_velocity_mm_s, -1.0, 1.0)
+        duty = np.zeros_like(velocity)
+        for direction, sign in (('left', 1.0), ('right', -1.0)):
+            sel = np.sign(velocity) == sign
+            if not sel.any():
+                continue
+            if direction not in self.lookup_table.duties:
+                raise ValueError(f"No calibration data for direction '{direction}'")
+            speeds = self.lookup_table.velocities(direction)
+            order = np.argsort(speeds)
+            magnitude = np.interp(np.abs(velocity[sel]), np.concatenate([[0.0], speeds[order]]),
+                                  np.concatenate([[0.0], self.lookup_table.duties[direction][order]]))
+            duty[sel] = -sign * magnitude
+        return duty
+
+    def dead_time(self, direction):
+        # Seconds between commanding full duty and the carriage moving; 0 without a calibrated table
+        if self.lookup_table is None or direction not in self.lookup_table.durations:
+            return 0.0
+        return float(self.lookup_table.durations[direction][-1, 0])
+
+    def estimate_time_to_travel(self, direction, distance_mm, duty=1.0):
+        if self.lookup_table is not None:
+            return self.lookup_table.duration(direction, distance_mm, duty)
+
         model = self.models[direction]
         slope = model['slope']
         intercept = model['intercept']
         if slope == 0:
             raise ValueError("Slope is zero; cannot compute time.")
-        return (distance_mm - intercept) / slope
+        duration = (distance_mm - intercept) / slope
+        if duration <= 0:
+            raise ValueError(f"Linear motion model gives a non-positive duration ({duration:.2f} s) for "
+                             f"{distance_mm} mm {direction}; record a calibration with motion_calibration.py")
+        return duration
@@ -0,0 +1,160 @@
+import numpy as np
+
+class MotionSegment:
+    def __init__(self, key, start_mm, end_mm, v_start, v_peak, v_end, t_accel, t_cruise, t_decel, dwell):
+        self.key = key
+        self.start_mm = start_mm
+        self.end_mm = end_mm
+        self.v_start = v_start
+        self.v_peak = v_peak
+        self.v_end = v_end
+        self.t_accel = t_accel
+        self.t_cruise = t_cruise
+        self.t_decel = t_decel
+        self.dwell = dwell
+
+    @property
+    def direction(self):
+        return np.sign(self.end_mm - self.start_mm)
+
+    @property
+    def duration(self):
+        return self.t_accel + self.t_cruise + self.t_decel + self.dwell
+
+    def speed_at(self, t):
+        # Unsigned trapezoidal speed profile at time t (array) into the segment
+        t = np.asarray(t, dtype=np.float64)
+        accel = (self.v_peak - self.v_start) / self.t_accel if self.t_accel > 0 else 0.0
+        decel = (self.v_peak - self.v_end) / self.t_decel if self.t_decel > 0 else 0.0
+        t_decel_start = self.t_accel + self.t_cruise
+        t_move_end = t_decel_start + self.t_decel
+        return np.select(
+            [t < self.t_accel, t < t_decel_start, t < t_move_end],
+            [self.v_start + accel * t, self.v_peak, self.v_peak - decel * (t - t_decel_start)],
+            default=0.0)
+
+    def distance_at(self, t):
+        # Unsigned distance covered t seconds into the segment
+        t = np.asarray(t, dtype=np.float64)
+        accel = (self.v_peak - self.v_start) / self.t_accel if self.t_accel > 0 else 0.0
+        decel = (self.v_peak - self.v_end) / self.t_decel if self.t_decel > 0 else 0.0
+        t1 = np.clip(t, 0.0, self.t_accel)
+        t2 = np.clip(t - self.t_accel, 0.0, self.t_cruise)
+        t3 = np.clip(t - self.t_accel - self.t_cruise, 0.0, self.t_decel)
+        distance = self.v_start * t1 + 0.5 * accel * t1 ** 2 + self.v_peak * (t2 + t3) - 0.5 * decel * t3 ** 2
+        return np.minimum(distance, abs(self.end_mm - self.start_mm))
+
+
+class TypingPlan:
+    def __init__(self, text, segments):
+        self.text = text
+        self.segments = segments
+        durations = np.array([s.duration for s in segments])
+        self.key_times = np.cumsum(durations)
+        self.start_times = self.key_times - durations
+        # Wall-clock time the axis actually took, set once the plan has been executed
+        self.measured_time = None
+
+    @property
+    def total_time(self):
+        return float(self.key_times[-1]) if len(self.segments) else 0.0
+
+    @property
+    def chars_per_second(self):
+        return len(self.segments) / self.total_time if self.total_time > 0 else float('inf')
+
+    def velocity_at(self, t):
+        # Signed axis velocity in mm/s at time(s) t since the start of the plan
+        t = np.atleast_1d(np.asarray(t, dtype=np.float64))
+        velocity = np.zeros_like(t)
+        idx = np.clip(np.searchsorted(self.key_times, t, side='right'), 0, len(self.segments) - 1)
+        for i in np.unique(idx):
+            sel = idx == i
+            seg = self.segments[i]
+            velocity[sel] = seg.direction * seg.speed_at(t[sel] - self.start_times[i])
+        velocity[t >= self.total_time] = 0.0
+        return velocity
+
+    def position_at(self, t):
+        # Axis position in mm at time(s) t since the start of the plan
+        t = np.atleast_1d(np.asarray(t, dtype=np.float64))
+        position = np.empty_like(t)
+        idx = np.clip(np.searchsorted(self.key_times, t, side='right'), 0, len(self.segments) - 1)
+        for i in np.unique(idx):
+            sel = idx == i
+            seg = self.segments[i]
+            position[sel] = seg.start_mm + seg.direction * seg.distance_at(t[sel] - self.start_times[i])
+        position[t >= self.total_time] = self.segments[-1].end_mm
+        return position
+
+
+class TypingPlanner:
+    def __init__(self, layout, max_velocity_mm_s, acceleration_mm_s2, pass_velocity_mm_s=0.0, dwell_s=0.0,
+                 axis_origin_mm=0.0, axis_sign=1.0):
+        self.layout = layout
+        self.max_velocity = max_velocity_mm_s
+        self.acceleration = acceleration_mm_s2
+        # Speed allowed while passing over a key without reversing; 0 stops on every key
+        self.pass_velocity = min(pass_velocity_mm_s, max_velocity_mm_s)
+        self.dwell = dwell_s
+        # Axis position (as tracked by PositionAwareMotor) = origin + sign * layout x
+        self.axis_origin = axis_origin_mm
+        self.axis_sign = axis_sign
+
+    @classmethod
+    def from_config(cls, layout, config):
+        planner = config.get('planner', {})
+        return cls(layout,
+                   max_velocity_mm_s=planner.get('max_velocity_mm_s', 20.0),
+                   acceleration_mm_s2=planner.get('acceleration_mm_s2', 100.0),
+                   pass_velocity_mm_s=planner.get('pass_velocity_mm_s', 0.0),
+                   dwell_s=planner.get('dwell_s', 0.0),
+                   axis_origin_mm=planner.get('axis_origin_mm', 0.0),
+                   axis_sign=planner.get('axis_sign', 1.0))
+
+    def targets(self, text):
+        return self.axis_origin + self.axis_sign * self.layout.text_to_mm(text)[:, 0]
+
+    def plan(self, text, start_mm, pass_velocity=None):
+        pass_velocity = self.pass_velocity if pass_velocity is None else pass_velocity
+        targets = self.targets(text)
+        points = np.concatenate([[start_mm], targets])
+        deltas = np.diff(points)
+        distances = np.abs(deltas)
+        directions = np.sign(deltas)
+
+        # Junction speed limits: full stop where the axis reverses, dwells, or at the final key
+        junction = np.zeros(len(points))
+        if self.dwell == 0 and pass_velocity > 0:
+            same_direction = (directions[:-1] * directions[1:]) > 0
+            junction[1:-1] = np.where(same_direction, pass_velocity, 0.0)
+
+        # Lookahead: forward pass limits by what we can accelerate to, backward pass by what we can stop from
+        a = self.acceleration
+        v = junction.copy()
+        v[0] = 0.0
+        for i in range(len(distances)):
+            v[i + 1] = min(v[i + 1], np.sqrt(v[i] ** 2 + 2 * a * distances[i]))
+        for i in range(len(distances) - 1, -1, -1):
+            v[i] = min(v[i], np.sqrt(v[i + 1] ** 2 + 2 * a * distances[i]))
+
+        segments = []
+        for i, key in enumerate(text.lower()):
+            segments.append(self._segment(key, points[i], points[i + 1], v[i], v[i + 1]))
+        return TypingPlan(text, segments)
+
+    def stop_and_go_time(self, text, start_mm):
+        return self.plan(text, start_mm, pass_velocity=0.0).total_time
+
+    def _segment(self, key, start_mm, end_mm, v0, v1):
+        a = self.acceleration
+        d = abs(end_mm - start_mm)
+        dwell = self.dwell if v1 == 0 else 0.0
+        if d < 1e-9:
+            return MotionSegment(key, start_mm, end_mm, 0.0, 0.0, 0.0, 0.0, 0.0, 0.0, dwell)
+        v_peak = min(self.max_velocity, np.sqrt((2 * a * d + v0 ** 2 + v1 ** 2) / 2))
+        t_accel = (v_peak - v0) / a
+        t_decel = (v_peak - v1) / a
+        d_ramps = (2 * v_peak ** 2 - v0 ** 2 - v1 ** 2) / (2 * a)
+        t_cruise = max(d - d_ramps, 0.0) / v_peak
+        return MotionSegment(key, start_mm, end_mm, v0, v_peak, v1, t_accel, t_cruise, t_decel, dwell)
@@ -1,28 +1,121 @@
 
+import time
+import numpy as np
 from auto_typing.motor_control.distance_controller import DistanceMotorController
+from auto_typing.motor_control.motion_model import MotorMotionModel
 
 class PositionAwareMotor:
-    def __init__(self, initial_position_mm=0.0, channel=2):
+    def __init__(self, initial_position_mm=0.0, channel=2, ticks_per_mm=None, tolerance_mm=0.5,
+                 timeout_s=10.0, motion_magic=True, cruise_velocity_mm_s=20.0, acceleration_mm_s2=100.0, model=None):
         self.current_position = initial_position_mm
-        self.motor = DistanceMotorController(channel=channel)
+        self.motor = DistanceMotorController(channel=channel, model=model)
+        # With an encoder scale, moves run closed-loop on the Talon and finish when the encoder says so
+        self.ticks_per_mm = ticks_per_mm
+        self.tolerance_mm = tolerance_mm
+        self.timeout_s = timeout_s
+        self.motion_magic = motion_magic
+        if self.closed_loop:
+            self.motor.controller.zero_position(initial_position_mm * ticks_per_mm)
+            if motion_magic:
+                # Talon units are ticks per 100 ms (and per second for acceleration)
+                self.motor.controller.configure_motion_magic(abs(cruise_velocity_mm_s * ticks_per_mm) / 10.0,
+                                                             abs(acceleration_mm_s2 * ticks_per_mm) / 10.0)
 
-    def move_relative(self, direction, distance_mm, duty=1.0):
+    @classmethod
+    def from_config(cls, config, initial_position_mm=0.0, channel=2):
+        motion = config.get('motion', {})
+        return cls(initial_position_mm, channel=channel,
+                   ticks_per_mm=motion.get('ticks_per_mm'),
+                   tolerance_mm=motion.get('position_tolerance_mm', 0.5),
+                   timeout_s=motion.get('position_timeout_s', 10.0),
+                   motion_magic=motion.get('motion_magic', True),
+                   cruise_velocity_mm_s=motion.get('cruise_velocity_mm_s', 20.0),
+                   acceleration_mm_s2=motion.get('acceleration_mm_s2', 100.0),
+                   model=MotorMotionModel.from_config(config))
+
+    @property
+    def closed_loop(self):
+        return self.ticks_per_mm is not None
+
+    def move_relative(self, direction, distance_mm, duty=1.0, blocking=True):
         if direction == 'left':
-            self.current_position += distance_mm
+            target = self.get_position() + distance_mm
         elif direction == 'right':
-            self.current_position -= distance_mm
+            target = self.get_position() - distance_mm
         else:
             raise ValueError("Direction must be 'left' or 'right'")
 
-        self.motor.move(direction, distance_mm, duty=duty)
+        if self.closed_loop:
+            return self._move_closed_loop(target, blocking)
+        self.current_position = target
+        return self.motor.move(direction, distance_mm, duty=duty, blocking=blocking)
 
-    def move_to(self, target_position_mm, duty=1.0):
-        delta = target_position_mm - self.current_position
+    def _move_closed_loop(self, target_position_mm, blocking):
+        controller = self.motor.controller
+        handle = controller.start_position_move(target_position_mm * self.ticks_per_mm,
+                                                abs(self.tolerance_mm * self.ticks_per_mm),
+                                                self.timeout_s, motion_magic=self.motion_magic)
+        if blocking:
+            handle.wait()
+            self.current_position = self.get_position()
+            if handle.state != handle.State.COMPLETED:
+                print(f"⚠️ Closed-loop move ended {handle.state.name.lower()} at {self.current_position:.2f} mm "
+                      f"(target {target_position_mm:.2f} mm)")
+        else:
+            self.current_position = target_position_mm
+        return handle
+
+    def move_to(self, target_position_mm, duty=1.0, blocking=True):
+        delta = target_position_mm - self.get_position()
         if abs(delta) < 1e-2:
             print("🟢 Already at target position.")
             return
         direction = 'left' if delta > 0 else 'right'
-        self.move_relative(direction, abs(delta), duty=duty)
+        return self.move_relative(direction, abs(delta), duty=duty, blocking=blocking)
 
     def get_position(self):
+        if self.closed_loop:
+            return self.motor.controller.get_position() / self.ticks_per_mm
         return self.current_position
+
+    def type_text(self, text, planner, on_key=None, rate_hz=200):
+        plan = planner.plan(text, self.get_position())
+        print(f"⌨️ Typing {len(text)} keys, planned ~{plan.total_time:.2f} s ({plan.chars_per_second:.2f} chars/s)")
+        if not plan.segments:
+            return plan
+
+        # The merged profile, pass-through speeds included, runs on the native thread as one trajectory sampled
+        # at rate_hz: encoder setpoints closed-loop, calibrated duties open-loop
+        dt = 1.0 / rate_hz
+        t = np.arange(0.0, plan.total_time + dt, dt)
+        controller = self.motor.controller
+        if self.closed_loop:
+            handle = controller.start_profile(plan.position_at(t) * self.ticks_per_mm, dt, True,
+                                              abs(self.tolerance_mm * self.ticks_per_mm), self.timeout_s,
+                                              feed_ms=self.motor.feedforward)
+        else:
+            # Each velocity is commanded one dead time early so the carriage keeps to the plan's timing
+            model = self.motor.model
+            lead = max(model.dead_time('left'), model.dead_time('right'))
+            duty = model.duty_for_velocity(plan.velocity_at(t + lead), planner.max_velocity)
+            handle = controller.start_profile(duty, dt, False, feed_ms=self.motor.feedforward)
+
+        # Keys fire on the plan's schedule while the axis moves
+        for segment, key_time in zip(plan.segments, plan.key_times):
+            while not handle.done and handle.elapsed < key_time:
+                time.sleep(min(key_time - handle.elapsed, dt))
+            if on_key is not None:
+                on_key(segment.key)
+        handle.wait()
+        plan.measured_time = handle.elapsed
+
+        if self.closed_loop:
+            self.current_position = self.get_position()
+            if handle.state != handle.State.COMPLETED:
+                print(f"⚠️ Typing profile ended {handle.state.name.lower()} at {self.current_position:.2f} mm "
+                      f"(target {plan.segments[-1].end_mm:.2f} mm)")
+        else:
+            self.current_position = plan.segments[-1].end_mm
+        print(f"⏱️ Typed in {plan.measured_time:.2f} s (planned {plan.total_time:.2f} s, "
+              f"{handle.missed_deadlines} missed ticks)")
+        return plan
@@ -0,0 +1,86 @@
+import cv2
+import numpy as np
+
+TOPHAT_KERNEL = cv2.getStructuringElement(cv2.MORPH_RECT, (15, 15))
+CLEAN_KERNEL = np.ones((3, 3), np.uint8)
+
+class FrameContext:
+    def __init__(self, image=None, pyramid_levels=3, tophat_threshold=30):
+        self.pyramid_levels = pyramid_levels
+        self.tophat_threshold = tophat_threshold
+        self.frame_id = 0
+        self.image = None
+        self._buffers = {}
+        self._cache = {}
+        if image is not None:
+            self.reset(image)
+
+    @classmethod
+    def wrap(cls, image):
+        return image if isinstance(image, cls) else cls(image)
+
+    def reset(self, image):
+        # Invalidate derived images but keep their buffers so the next frame writes in place
+        self.image = image
+        self.frame_id += 1
+        self._cache.clear()
+        return self
+
+    @property
+    def shape(self):
+        return self.image.shape[:2]
+
+    @property
+    def gray(self):
+        if 'gray' not in self._cache:
+            if self.image.ndim == 2:
+                self._cache['gray'] = self.image
+            else:
+                self._cache['gray'] = cv2.cvtColor(self.image, cv2.COLOR_BGR2GRAY, dst=self._buffer('gray'))
+        return self._cache['gray']
+
+    @property
+    def blurred(self):
+        if 'blurred' not in self._cache:
+            self._cache['blurred'] = cv2.GaussianBlur(self.gray, (5, 5), 0, dst=self._buffer('blurred'))
+        return self._cache['blurred']
+
+    @property
+    def tophat(self):
+        if 'tophat' not in self._cache:
+            self._cache['tophat'] = cv2.morphologyEx(self.blurred, cv2.MORPH_TOPHAT, TOPHAT_KERNEL,
+                                                     dst=self._buffer('tophat'))
+        return self._cache['tophat']
+
+    @property
+    def binary(self):
+        if 'binary' not in self._cache:
+            _, self._cache['binary'] = cv2.threshold(self.tophat, self.tophat_threshold, 255, cv2.THRESH_BINARY,
+                                                     dst=self._buffer('binary'))
+        return self._cache['binary']
+
+    @property
+    def cleaned(self):
+        if 'cleaned' not in self._cache:
+            self._cache['cleaned'] = cv2.morphologyEx(self.binary, cv2.MORPH_OPEN, CLEAN_KERNEL,
+                                                      dst=self._buffer('cleaned'))
+        return self._cache['cleaned']
+
+    @property
+    def pyramid(self):
+        if 'pyramid' not in self._cache:
+            levels = [self.gray]
+            for level in range(1, self.pyramid_levels):
+                h, w = levels[-1].shape
+                dst = self._buffer(f'pyramid{level}', ((h + 1) // 2, (w + 1) // 2))
+                levels.append(cv2.pyrDown(levels[-1], dst=dst))
+            self._cache['pyramid'] = levels
+        return self._cache['pyramid']
+
+    def _buffer(self, name, shape=None, dtype=np.uint8):
+        shape = self.shape if shape is None else shape
+        buf = self._buffers.get(name)
+        if buf is None or buf.shape != tuple(shape) or buf.dtype != dtype:
+            buf = np.empty(shape, dtype)
+            self._buffers[name] = buf
+        return buf
@@ -0,0 +1,153 @@
+import json
+import cv2
+import yaml
+import numpy as np
+from pathlib import Path
+from functools import lru_cache
+from types import MappingProxyType
+from auto_typing.utils.config import ROOT_DIR
+
+DEFAULT_LAYOUT_FILE = ROOT_DIR / 'models' / 'keyboard_layout.yaml'
+
+@lru_cache(maxsize=None)
+def load_key_positions(path=DEFAULT_LAYOUT_FILE):
+    # {key: (x, y, height)} in mm (x to the right, y up from the bottom row), read once per file; read-only
+    # because every caller shares the cached mapping
+    path = Path(path)
+    with path.open('r') as f:
+        data = json.load(f) if path.suffix == '.json' else yaml.safe_load(f)
+    return MappingProxyType({str(k).lower(): tuple(float(v) for v in pos) for k, pos in data.get('keys', data).items()})
+
+KEY_POSITIONS = load_key_positions()
+
+def match_detections(detections, key_positions=KEY_POSITIONS):
+    chars, pixels, mm = [], [], []
+    for (x, y, w, h), char in detections:
+        key = char.lower()
+        if key in key_positions and key not in chars:
+            chars.append(key)
+            pixels.append((x + w / 2, y + h / 2))
+            mm.append(key_positions[key][:2])
+    return chars, np.array(pixels, np.float64).reshape(-1, 2), np.array(mm, np.float64).reshape(-1, 2)
+
+
+def fit_layout_transform(detections, key_positions=KEY_POSITIONS, model='affine', ransac_threshold=8.0):
+    # One robust fit from layout mm to image pixels; OCR misreads end up as RANSAC outliers
+    chars, pixels, mm = match_detections(detections, key_positions)
+    if model == 'affine':
+        if len(chars) < 3:
+            raise ValueError(f"Need at least 3 recognized keys for an affine fit, got {len(chars)}")
+        matrix, inliers = cv2.estimateAffine2D(mm, pixels, method=cv2.RANSAC, ransacReprojThreshold=ransac_threshold)
+        if matrix is not None:
+            matrix = np.vstack([matrix, [0.0, 0.0, 1.0]])
+    elif model == 'homography':
+        if len(chars) < 4:
+            raise ValueError(f"Need at least 4 recognized keys for a homography fit, got {len(chars)}")
+        matrix, inliers = cv2.findHomography(mm, pixels, cv2.RANSAC, ransac_threshold)
+    else:
+        raise ValueError(f"Unknown layout model '{model}', expected 'affine' or 'homography'")
+
+    if matrix is None:
+        raise ValueError("Layout fit failed: recognized keys are degenerate (e.g. all on one row)")
+    inliers = inliers.ravel().astype(bool)
+    return matrix, {char: bool(ok) for char, ok in zip(chars, inliers)}
+
+
+def project_mm_to_pixels(matrix, mm):
+    mm = np.asarray(mm, np.float64).reshape(-1, 2)
+    projected = np.hstack([mm, np.ones((len(mm), 1))]) @ matrix.T
+    return projected[:, :2] / projected[:, 2:3]
+
+
+def project_key_positions(matrix, key_positions=KEY_POSITIONS, keys=None):
+    keys = list(key_positions) if keys is None else [k for k in keys if k in key_positions]
+    if not keys:
+        return {}
+    pixels = project_mm_to_pixels(matrix, [key_positions[k][:2] for k in keys])
+    return {k: (float(px), float(py)) for k, (px, py) in zip(keys, pixels)}
+
+
+def pixel_to_mm_scale(matrix):
+    # Local px/mm along the layout axes (exact for an affine fit, at the layout origin for a homography)
+    linear = matrix[:2, :2] / matrix[2, 2]
+    return float(np.linalg.norm(linear[:, 0])), float(np.linalg.norm(linear[:, 1]))
+
+
+class KeyboardLayout:
+    def __init__(self, keys, positions):
+        self.keys = [k.lower() for k in keys]
+        # Contiguous (N, 3) array of key center x, y and height in mm; row order matches self.keys
+        self.positions = np.ascontiguousarray(positions, dtype=np.float64).reshape(-1, 3)
+        self.centers = np.ascontiguousarray(self.positions[:, :2])
+        self.index = {k: i for i, k in enumerate(self.keys)}
+        # Lookup table for single-byte characters so whole strings map to indices without a Python loop
+        self._char_table = np.full(256, -1, dtype=np.intp)
+        for k, i in self.index.items():
+            if len(k) == 1 and ord(k) < 256:
+                self._char_table[ord(k)] = i
+                self._char_table[ord(k.upper())] = i
+
+    @classmethod
+    def from_dict(cls, key_positions):
+        keys = list(key_positions)
+        return cls(keys, [key_positions[k] for k in keys])
+
+    @classmethod
+    def from_file(cls, path):
+        return cls.from_dict(load_key_positions(Path(path)))
+
+    @classmethod
+    def from_config(cls, config):
+        layout_file = config.get('layout', {}).get('file')
+        if layout_file is None:
+            return cls.from_dict(KEY_POSITIONS)
+        layout_path = Path(layout_file)
+        return cls.from_file(layout_path if layout_path.is_absolute() else ROOT_DIR / layout_path)
+
+    def to_dict(self):
+        return {k: tuple(float(v) for v in pos) for k, pos in zip(self.keys, self.positions)}
+
+    def __len__(self):
+        return len(self.keys)
+
+    def __contains__(self, key):
+        return key.lower() in self.index
+
+    def indices(self, text, skip_unknown=False):
+        encoded = np.frombuffer(text.encode('latin-1', errors='replace'), dtype=np.uint8)
+        idx = self._char_table[encoded]
+        unknown = idx < 0
+        if unknown.any():
+            if not skip_unknown:
+                missing = sorted({text[i] for i in np.flatnonzero(unknown)})
+                raise KeyError(f"Characters not in keyboard layout: {missing}")
+            idx = idx[~unknown]
+        return idx
+
+    def text_to_mm(self, text, skip_unknown=False):
+        return self.centers[self.indices(text, skip_unknown)]
+
+    def text_to_pixels(self, text, matrix, skip_unknown=False):
+        return project_mm_to_pixels(matrix, self.text_to_mm(text, skip_unknown))
+
+    def nearest(self, points_mm, max_distance=None):
+        # Brute force over all keys: with a few dozen keys one (M, N) distance array beats any tree
+        points_mm = np.asarray(points_mm, np.float64).reshape(-1, 2)
+        d2 = ((points_mm[:, None, :] - self.centers[None, :, :]) ** 2).sum(axis=2)
+        idx = d2.argmin(axis=1)
+        dist = np.sqrt(d2[np.arange(len(idx)), idx])
+        if max_distance is not None:
+            idx = np.where(dist <= max_distance, idx, -1)
+        return idx, dist
+
+    def nearest_to_pixels(self, points_px, matrix, max_distance=None):
+        return self.nearest(project_mm_to_pixels(np.linalg.inv(matrix), points_px), max_distance)
+
+    def distance_matrix(self, keys=None):
+        centers = self.centers if keys is None else self.centers[[self.index[k.lower()] for k in keys]]
+        diff = centers[:, None, :] - centers[None, :, :]
+        return np.sqrt((diff ** 2).sum(axis=2))
+
+    def travel_distances(self, text, skip_unknown=False):
+        points = self.text_to_mm(text, skip_unknown)
+        return np.linalg.norm(np.diff(points, axis=0), axis=1)
@@ -1,11 +1,29 @@
 
+import os
 import cv2
+import functools
 import numpy as np
-import pytesseract
-pytesseract.pytesseract.tesseract_cmd = r'C:\\Program Files\\Tesseract-OCR\\tesseract.exe'
 from pathlib import Path
 from datetime import datetime
 from auto_typing.utils.config import ROOT_DIR
+from auto_typing.utils.run_log import RunLogger
+from auto_typing.utils.profiler import StageProfiler
+from auto_typing.phase1.ocr import KeyOCR
+from auto_typing.phase1.frame import FrameContext
+from auto_typing.phase1.plane import fit_plane_ransac
+from auto_typing.phase1.stereo import StereoDepth
+from auto_typing.calibration.camera_model import CameraModel
+
+def stage(name):
+    # Times the wrapped method as a profiler span; spans are also forwarded to the run log
+    def decorator(method):
+        @functools.wraps(method)
+        def wrapper(self, *args, **kwargs):
+            with self.profiler.span(name):
+                return method(self, *args, **kwargs)
+        return wrapper
+    return decorator
+
 
 class Phase1KeyboardLocalization:
     def __init__(self, config):
@@ -14,108 +32,155 @@ class Phase1KeyboardLocalization:
         self.log_dir = ROOT_DIR / config['paths']['log_dir']
         self.log_dir.mkdir(parents=True, exist_ok=True)
         timestamp = datetime.now().strftime('%Y%m%d_%H%M%S')
-        self.log_file = self.log_dir / f'phase1_log_{timestamp}.txt'
-        self.log(f"Initialized Phase1KeyboardLocalization at {timestamp}")
-
+        # JSON lines, one file per process: pipeline workers start within the same second
+        self.log_file = self.log_dir / f'phase1_log_{timestamp}_{os.getpid()}.jsonl'
+        self.logger = RunLogger(self.log_file, enabled=self.verbose)
+        # Set by the caller for each new frame so records of one frame can be grouped
+        self.frame_id = None
+        self.profiler = StageProfiler(config.get('profiling', {}).get('capacity', 4096))
+        self.profiler.sinks.append(self._log_span)
+        self.log("Initialized Phase1KeyboardLocalization at %s", timestamp)
+        self.ocr = KeyOCR.from_config(config)
+
+        self.camera = CameraModel.from_config(config)
+        self.stereo = StereoDepth.from_config(config)
+        self.camera_matrix = self.camera.camera_matrix
         if config.get('calibration', {}).get('load_from_file', False):
-            calib_file = ROOT_DIR / config['calibration']['output_file']
-            if not calib_file.exists():
-                raise FileNotFoundError(f"Camera intrinsics file not found at: {calib_file}")
-            data = np.load(calib_file)
-            self.camera_matrix = data['camera_matrix']
             self.log("Loaded camera matrix from file.")
         else:
-            f = config['depth']['focal_length']
-            self.camera_matrix = np.array([[f, 0, 320],
-                                           [0, f, 240],
-                                           [0, 0, 1]])
             self.log("Using fallback camera matrix from config.")
 
-    def log(self, message):
-        if self.verbose:
-            with open(self.log_file, 'a') as f:
-                f.write(f"{datetime.now().isoformat()} - {message}\n")
-
+    def warm_up(self, frame_shape=(480, 640), ocr=True):
+        # Run every OpenCV stage once on a synthetic frame so first-call setup is paid before the first job
+        self.log("Warming up OpenCV and Tesseract...")
+        rng = np.random.default_rng(0)
+        image = cv2.cvtColor(rng.integers(0, 256, frame_shape, dtype=np.uint8), cv2.COLOR_GRAY2BGR)
+        frame1 = FrameContext(image)
+        frame2 = FrameContext(np.roll(image, 2, axis=1))
+        frame1.pyramid
+        self.estimate_depth_from_flow(frame1, frame2, 0.01)
+        cv2.findContours(frame1.cleaned, cv2.RETR_EXTERNAL, cv2.CHAIN_APPROX_SIMPLE)
+        fit_plane_ransac(rng.random((16, 3)))
+        if ocr:
+            version = self.ocr.warm_up()
+            self.log("Tesseract %s ready.", version)
+
+    def log(self, message, *args):
+        self.logger.log(message, *args, frame_id=self.frame_id)
+
+    def _log_span(self, stage, duration_ns):
+        self.logger.record(stage, self.frame_id, duration_ns)
+
+    def close(self):
+        self.logger.close()
+
+    def undistort(self, image, out=None):
+        return self.camera.undistort(image, out)
+
+    @stage('features')
     def detect_features(self, image):
         self.log("Detecting good features to track (Shi-Tomasi)...")
-        gray = cv2.cvtColor(image, cv2.COLOR_BGR2GRAY)
+        gray = FrameContext.wrap(image).gray
         features = cv2.goodFeaturesToTrack(
             gray,
             maxCorners=1000,
             qualityLevel=0.01,
             minDistance=10
         )
-        self.log(f"Detected {len(features) if features is not None else 0} trackable points.")
+        self.log("Detected %d trackable points.", 0 if features is None else len(features))
         return features
 
-    def estimate_depth_from_flow(self, img1, img2, translation_m):
+    @stage('flow')
+    def estimate_depth_from_flow(self, img1, img2, translation_m, return_depth_map=False):
         self.log("Estimating depth from optical flow...")
-        gray1 = cv2.cvtColor(img1, cv2.COLOR_BGR2GRAY)
-        gray2 = cv2.cvtColor(img2, cv2.COLOR_BGR2GRAY)
+        frame1, frame2 = FrameContext.wrap(img1), FrameContext.wrap(img2)
+        gray1, gray2 = frame1.gray, frame2.gray
+        depth_map = np.zeros(gray1.shape, dtype=np.float32) if return_depth_map else None
 
-        pts1 = self.detect_features(img1)
+        pts1 = self.detect_features(frame1)
         if pts1 is None:
             self.log("No features to track in image 1.")
-            return np.array([]), np.array([])
+            empty = (np.empty((0, 2), np.float32), np.empty(0, np.float32))
+            return empty + (depth_map,) if return_depth_map else empty
 
-        pts2, status, _ = cv2.calcOpticalFlowPyrLK(gray1, gray2, pts1, None)
-
-        focal_length = self.camera_matrix[0, 0]
-        depths = []
-        pts1_filtered = []
+        with self.profiler.span('lk'):
+            pts2, status, _ = cv2.calcOpticalFlowPyrLK(gray1, gray2, pts1, None)
+            valid = status.ravel() == 1
 
-        for (p1, p2, s) in zip(pts1, pts2, status):
-            if s[0] == 1:
-                dx = p2[0][0] - p1[0][0]
-                if abs(dx) > 1e-3:
-                    Z = (focal_length * translation_m) / dx
-                    depths.append(Z)
-                    pts1_filtered.append(p1[0])
+            # Forward-backward check: track back to image 1 and drop points that do not return home
+            fb_max_error = self.config.get('flow', {}).get('fb_max_error', 1.0)
+            if fb_max_error is not None:
+                pts1_back, status_back, _ = cv2.calcOpticalFlowPyrLK(gray2, gray1, pts2, None)
+                fb_error = np.linalg.norm(pts1.reshape(-1, 2) - pts1_back.reshape(-1, 2), axis=1)
+                valid &= (status_back.ravel() == 1) & (fb_error < fb_max_error)
 
-        self.log(f"Tracked {len(depths)} points with valid depth estimates.")
-        return np.array(pts1_filtered), np.array(depths)
+        p1 = pts1.reshape(-1, 2)
+        dx = pts2.reshape(-1, 2)[:, 0] - p1[:, 0]
+        valid &= np.abs(dx) > 1e-3
 
-    def compute_disparity_map(self, imgL, imgR):
+        focal_length = self.camera_matrix[0, 0]
+        with np.errstate(divide='ignore', invalid='ignore'):
+            depths = (focal_length * translation_m) / dx
+        # Tracks that moved against the camera shift (e.g. aliased onto a neighbouring key) give depth <= 0
+        valid &= np.isfinite(depths) & (depths > 0)
+        pts1_filtered = p1[valid]
+        depths = depths[valid].astype(np.float32)
+
+        self.log("Tracked %d points with valid depth estimates.", len(depths))
+        if not return_depth_map:
+            return pts1_filtered, depths
+
+        cols = np.rint(pts1_filtered[:, 0]).astype(np.intp)
+        rows = np.rint(pts1_filtered[:, 1]).astype(np.intp)
+        inside = (rows >= 0) & (rows < depth_map.shape[0]) & (cols >= 0) & (cols < depth_map.shape[1])
+        depth_map[rows[inside], cols[inside]] = depths[inside]
+        return pts1_filtered, depths, depth_map
+
+    @stage('disparity')
+    def compute_disparity_map(self, imgL, imgR, roi=None):
+        # Float disparity in pixels; roi (x, y, w, h), e.g. from boxes_roi, limits matching to the keyboard
         self.log("Computing disparity map...")
-        stereo = cv2.StereoBM_create(numDisparities=16, blockSize=15)
-        disparity = stereo.compute(imgL, imgR)
-        return disparity
+        return self.stereo.disparity(imgL, imgR, roi)
 
-    def estimate_depth_map(self, disparity):
+    @stage('depth')
+    def estimate_depth_map(self, disparity, roi=None):
         self.log("Estimating depth map from disparity...")
-        focal_length = self.config['depth']['focal_length']
-        baseline = self.config['depth']['baseline']
-        depth_map = (focal_length * baseline) / (disparity + 1e-6)
-        return depth_map
+        return self.stereo.depth(disparity, roi)
 
+    @stage('text')
     def detect_text_regions(self, image):
         self.log("Detecting keyboard key regions using morphology and OCR...")
-        gray = cv2.cvtColor(image, cv2.COLOR_BGR2GRAY)
-        blurred = cv2.GaussianBlur(gray, (5, 5), 0)
-        kernel = cv2.getStructuringElement(cv2.MORPH_RECT, (15, 15))
-        tophat = cv2.morphologyEx(blurred, cv2.MORPH_TOPHAT, kernel)
-        _, thresh = cv2.threshold(tophat, 30, 255, cv2.THRESH_BINARY)
-        clean_kernel = np.ones((3, 3), np.uint8)
-        cleaned = cv2.morphologyEx(thresh, cv2.MORPH_OPEN, clean_kernel)
-
-        # Extract key contours
-        height = cleaned.shape[0]
-        mask = np.zeros_like(cleaned)
-        mask[int(height * 0.25):, :] = 255
-        masked = cv2.bitwise_and(cleaned, mask)
-        contours, _ = cv2.findContours(masked, cv2.RETR_EXTERNAL, cv2.CHAIN_APPROX_SIMPLE)
-        key_contours = [cnt for cnt in contours if 100 < cv2.contourArea(cnt) < 10000]
-
-        # Recognize characters using Tesseract
-        results = []
+        frame = FrameContext.wrap(image)
+        with self.profiler.span('morphology'):
+            gray = frame.gray
+            cleaned = frame.cleaned
+
+            # Extract key contours
+            height = cleaned.shape[0]
+            mask = np.zeros_like(cleaned)
+            mask[int(height * 0.25):, :] = 255
+            masked = cv2.bitwise_and(cleaned, mask)
+            contours, _ = cv2.findContours(masked, cv2.RETR_EXTERNAL, cv2.CHAIN_APPROX_SIMPLE)
+            key_contours = [cnt for cnt in contours if 100 < cv2.contourArea(cnt) < 10000]
+
+        # Recognize characters using Tesseract, all keys of the frame in one OCR batch
+        boxes, rois = [], []
         for cnt in key_contours:
             x, y, w, h = cv2.boundingRect(cnt)
             key_roi = gray[max(y-5,0):y+h+5, max(x-5,0):x+w+5]
             if key_roi.shape[0] < 20 or key_roi.shape[1] < 20:
                 key_roi = cv2.resize(key_roi, (0, 0), fx=2, fy=2)
-            char = pytesseract.image_to_string(key_roi, config='--psm 10 -c tessedit_char_whitelist=ABCDEFGHIJKLMNOPQRSTUVWXYZ0123456789').strip()
+            boxes.append((x, y, w, h))
+            rois.append(key_roi)
+
+        with self.profiler.span('ocr'):
+            chars = self.ocr.recognize(rois)
+        results = []
+        for box, char in zip(boxes, chars):
             if char and not char.isdigit() and char.upper() != 'P':
-                results.append(((x, y, w, h), char))
+                results.append((box, char))
+        if self.ocr.cache is not None and self.logger.enabled:
+            self.log("OCR cache: %s", self.ocr.cache.stats())
 
         # Format output in Tesseract-style dict
         text_boxes = {'left': [], 'top': [], 'width': [], 'height': [], 'conf': [], 'text': []}
@@ -129,6 +194,7 @@ class Phase1KeyboardLocalization:
 
         return text_boxes
 
+    @stage('backproject')
     def compute_3d_points_from_text(self, text_boxes, depth_map):
         self.log("Computing 3D points from text regions...")
         points_3d = []
@@ -136,29 +202,43 @@ class Phase1KeyboardLocalization:
             if int(text_boxes['conf'][i]) > self.config['text']['min_confidence']:
                 x, y, w, h = (text_boxes['left'][i], text_boxes['top'][i],
                               text_boxes['width'][i], text_boxes['height'][i])
+                z = self.sample_depth(depth_map, x, y, w, h)
+                if z is None:
+                    continue
                 cx, cy = x + w // 2, y + h // 2
-                z = depth_map[cy, cx]
                 X = (cx - self.camera_matrix[0, 2]) * z / self.camera_matrix[0, 0]
                 Y = (cy - self.camera_matrix[1, 2]) * z / self.camera_matrix[1, 1]
                 points_3d.append([X, Y, z])
-        self.log(f"Computed {len(points_3d)} 3D points.")
-        return np.array(points_3d)
-
+        self.log("Computed %d 3D points.", len(points_3d))
+        return np.array(points_3d).reshape(-1, 3)
+
+    def sample_depth(self, depth_map, x, y, w, h, max_grow=2):
+        # Median valid depth in the box; a sparse flow map rarely has a point at the exact center, so the
+        # window grows by the box size on each side (up to max_grow times) until it holds some tracked points
+        for grow in range(max_grow + 1):
+            window = depth_map[max(y - grow * h, 0):y + h + grow * h, max(x - grow * w, 0):x + w + grow * w]
+            valid = window[np.isfinite(window) & (window > 0)]
+            if valid.size:
+                return float(np.median(valid))
+        return None
+
+    @stage('plane')
     def fit_plane_svm(self, points_3d):
         self.log("Fitting plane using RANSAC...")
         if points_3d.shape[0] < 3:
             raise ValueError(f"Need at least 3 points to fit a plane, got {points_3d.shape[0]}")
-        from sklearn.linear_model import RANSACRegressor
-        X = points_3d[:, :2]
-        y = points_3d[:, 2]
-        model = RANSACRegressor().fit(X, y)
+        plane_cfg = self.config.get('plane', {})
+        model = fit_plane_ransac(points_3d,
+                                 threshold=plane_cfg.get('ransac_threshold'),
+                                 iterations=plane_cfg.get('ransac_iterations', 256),
+                                 seed=plane_cfg.get('seed', 0))
+        self.log("Plane fit with %d/%d inliers.", model.inliers.sum(), points_3d.shape[0])
         return model
 
+    @stage('pose')
     def compute_keyboard_pose(self, plane_model):
         self.log("Computing keyboard plane normal...")
-        coef = plane_model.estimator_.coef_
-        normal = np.array([-coef[0], -coef[1], 1.0])
-        normal = normal / np.linalg.norm(normal)
+        normal = plane_model.normal / np.linalg.norm(plane_model.normal)
         translation = np.array([0, 0, 0])  # To be updated
-        self.log(f"Keyboard normal: {normal.tolist()}")
+        self.log("Keyboard normal: %s", normal)
         return normal, translation
@@ -0,0 +1,178 @@
+import os
+import hashlib
+import subprocess
+import tempfile
+import threading
+from collections import OrderedDict
+from concurrent.futures import ThreadPoolExecutor
+
+import cv2
+import numpy as np
+from auto_typing.utils.lazy import LazyModule
+
+def _configure_tesseract(module):
+    # Explicit path from the environment, otherwise whatever tesseract is on PATH
+    cmd = os.environ.get('TESSERACT_CMD')
+    if cmd:
+        module.pytesseract.tesseract_cmd = cmd
+
+pytesseract = LazyModule('pytesseract', on_import=_configure_tesseract)
+
+KEY_OCR_CONFIG = '--psm 10 -c tessedit_char_whitelist=ABCDEFGHIJKLMNOPQRSTUVWXYZ0123456789'
+PAGE_SEPARATOR = '\f'
+
+
+class OCRCache:
+    def __init__(self, max_size=512, hash_size=16, levels=16):
+        self.max_size = max_size
+        self.hash_size = hash_size
+        self.levels = levels
+        self.hits = 0
+        self.misses = 0
+        self._entries = OrderedDict()
+        self._lock = threading.Lock()
+
+    def key(self, roi):
+        # Downsample and quantize so sensor noise between near-identical frames maps to the same key
+        small = cv2.resize(roi, (self.hash_size, self.hash_size), interpolation=cv2.INTER_AREA)
+        quantized = small // (256 // self.levels)
+        aspect = round(roi.shape[1] / max(roi.shape[0], 1), 1)
+        return hashlib.blake2b(quantized.tobytes() + str(aspect).encode(), digest_size=16).digest()
+
+    def get(self, key):
+        with self._lock:
+            if key in self._entries:
+                self._entries.move_to_end(key)
+                self.hits += 1
+                return self._entries[key]
+            self.misses += 1
+            return None
+
+    def put(self, key, text):
+        with self._lock:
+            self._entries[key] = text
+            self._entries.move_to_end(key)
+            while len(self._entries) > self.max_size:
+                self._entries.popitem(last=False)
+
+    def resize(self, max_size):
+        with self._lock:
+            self.max_size = max_size
+            while len(self._entries) > self.max_size:
+                self._entries.popitem(last=False)
+
+    def clear(self):
+        with self._lock:
+            self._entries.clear()
+            self.hits = 0
+            self.misses = 0
+
+    def stats(self):
+        with self._lock:
+            total = self.hits + self.misses
+            return {'hits': self.hits, 'misses': self.misses, 'size': len(self._entries),
+                    'max_size': self.max_size, 'hit_rate': self.hits / total if total else 0.0}
+
+
+# Shared by every KeyOCR in the process, so keys seen by one localizer are free for the next
+shared_cache = OCRCache()
+
+
+class KeyOCR:
+    BACKENDS = ('per_key', 'batch', 'parallel')
+
+    def __init__(self, backend='batch', workers=4, tesseract_config=KEY_OCR_CONFIG, cache=shared_cache,
+                 tesseract_cmd=None):
+        if backend not in self.BACKENDS:
+            raise ValueError(f"Unknown OCR backend '{backend}', expected one of {self.BACKENDS}")
+        self.backend = backend
+        self.tesseract_cmd = tesseract_cmd
+        self.workers = workers
+        self.tesseract_config = tesseract_config
+        self.cache = cache
+        self._pool = None
+
+    @classmethod
+    def from_config(cls, config):
+        text_cfg = config.get('text', {})
+        cache_size = text_cfg.get('ocr_cache_size', shared_cache.max_size)
+        if cache_size:
+            shared_cache.resize(cache_size)
+        return cls(backend=text_cfg.get('ocr_backend', 'batch'),
+                   workers=text_cfg.get('ocr_workers', 4),
+                   cache=shared_cache if cache_size else None,
+                   tesseract_cmd=text_cfg.get('tesseract_cmd'))
+
+    def warm_up(self):
+        # Start Tesseract once so the binary and traineddata are paged in before the first frame
+        if self.tesseract_cmd:
+            pytesseract.pytesseract.tesseract_cmd = self.tesseract_cmd
+        version = pytesseract.get_tesseract_version()
+        blank = np.full((32, 32), 255, np.uint8)
+        self._recognize_uncached([blank])
+        return version
+
+    def recognize(self, rois):
+        if not rois:
+            return []
+        if self.cache is None:
+            return self._recognize_uncached(rois)
+
+        # Tesseract config is part of the key so backends with different whitelists never share entries
+        keys = [self.cache.key(roi) + self.tesseract_config.encode() for roi in rois]
+        texts = [self.cache.get(key) for key in keys]
+        missing = [i for i, text in enumerate(texts) if text is None]
+        if missing:
+            for i, text in zip(missing, self._recognize_uncached([rois[i] for i in missing])):
+                texts[i] = text
+                self.cache.put(keys[i], text)
+        return texts
+
+    def _recognize_uncached(self, rois):
+        if self.tesseract_cmd:
+            pytesseract.pytesseract.tesseract_cmd = self.tesseract_cmd
+        if self.backend == 'batch':
+            return self._recognize_batch(rois)
+        if self.backend == 'parallel':
+            return self._recognize_parallel(rois)
+        return [self._recognize_one(roi) for roi in rois]
+
+    def close(self):
+        if self._pool is not None:
+            self._pool.shutdown(wait=True)
+            self._pool = None
+
+    def _recognize_one(self, roi):
+        return pytesseract.image_to_string(roi, config=self.tesseract_config).strip()
+
+    def _recognize_parallel(self, rois):
+        # pytesseract blocks in subprocess.wait, so threads are enough to keep several Tesseracts busy
+        if self._pool is None:
+            self._pool = ThreadPoolExecutor(max_workers=self.workers)
+        return list(self._pool.map(self._recognize_one, rois))
+
+    def _recognize_batch(self, rois):
+        # One Tesseract process per frame: every ROI becomes a page of a file list,
+        # and the text renderer separates pages with a form feed.
+        with tempfile.TemporaryDirectory(prefix='key_ocr_') as tmp_dir:
+            paths = []
+            for i, roi in enumerate(rois):
+                path = os.path.join(tmp_dir, f'key_{i:03d}.png')
+                cv2.imwrite(path, roi)
+                paths.append(path)
+            list_file = os.path.join(tmp_dir, 'keys.txt')
+            with open(list_file, 'w') as f:
+                f.write('\n'.join(paths) + '\n')
+
+            cmd = [pytesseract.pytesseract.tesseract_cmd, list_file, 'stdout'] + self.tesseract_config.split()
+            proc = subprocess.run(cmd, stdout=subprocess.PIPE, stderr=subprocess.PIPE)
+            if proc.returncode != 0:
+                raise pytesseract.TesseractError(proc.returncode, proc.stderr.decode(errors='ignore'))
+
+        pages = proc.stdout.decode('utf-8', errors='ignore').split(PAGE_SEPARATOR)
+        if len(pages) == len(rois) + 1 and not pages[-1].strip():
+            pages = pages[:-1]
+        if len(pages) != len(rois):
+            # Page boundaries are ambiguous, so fall back to one call per key rather than misassign text
+            return [self._recognize_one(roi) for roi in rois]
+        return [page.strip() for page in pages]
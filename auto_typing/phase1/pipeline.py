@@ -0,0 +1,297 @@
+import time
+import queue
+import ctypes
+import numpy as np
+import multiprocessing as mp
+from multiprocessing import shared_memory
+
+STAGES = ('capture', 'detect', 'pose')
+# Per-worker counter row: frames, busy ns, summed capture-to-done latency ns, max latency ns
+COUNTER_FIELDS = 4
+
+class SharedFrameRing:
+    def __init__(self, shape, slots, dtype=np.uint8, name=None):
+        self.shape = tuple(shape)
+        self.slots = slots
+        self.dtype = np.dtype(dtype)
+        nbytes = slots * int(np.prod(self.shape)) * self.dtype.itemsize
+        self.owner = name is None
+        self.shm = shared_memory.SharedMemory(name=name, create=self.owner, size=nbytes if self.owner else 0)
+        self.frames = np.ndarray((slots,) + self.shape, dtype=self.dtype, buffer=self.shm.buf)
+
+    @property
+    def name(self):
+        return self.shm.name
+
+    def attach_args(self):
+        return self.shape, self.slots, self.dtype.str, self.name
+
+    @classmethod
+    def attach(cls, shape, slots, dtype, name):
+        return cls(shape, slots, dtype, name)
+
+    def __getitem__(self, slot):
+        return self.frames[slot]
+
+    def close(self):
+        # Views into the buffer must go before the mapping can be closed
+        self.frames = None
+        self.shm.close()
+        if self.owner:
+            self.shm.unlink()
+
+
+class StageCounters:
+    def __init__(self, array, row):
+        self.array = array
+        self.base = row * COUNTER_FIELDS
+
+    def record(self, busy_ns, captured_ns):
+        latency = time.monotonic_ns() - captured_ns
+        a, b = self.array, self.base
+        a[b] += 1
+        a[b + 1] += busy_ns
+        a[b + 2] += latency
+        if latency > a[b + 3]:
+            a[b + 3] = latency
+
+
+def _capture_worker(config, source, ring_args, free_slots, out_queue, counters, row, max_frames, n_consumers):
+    from auto_typing.utils.frame_source import FrameSource
+    ring = SharedFrameRing.attach(*ring_args)
+    stats = StageCounters(counters, row)
+    seq = 0
+    try:
+        with FrameSource.from_config(config, source) as frames:
+            while max_frames is None or seq < max_frames:
+                slot = free_slots.get()
+                start = time.perf_counter_ns()
+                # Decode lands in the FrameSource ring, then one copy into shared memory; no pickling of pixels
+                try:
+                    frame, _, frame_id = frames.read(out=ring[slot])
+                except TimeoutError:
+                    # Slow first frame or a short camera stall: keep the slot and wait again
+                    free_slots.put(slot)
+                    continue
+                if frame is None:
+                    free_slots.put(slot)
+                    break
+                captured_ns = time.monotonic_ns()
+                out_queue.put((seq, slot, frame_id, captured_ns, None))
+                stats.record(time.perf_counter_ns() - start, captured_ns)
+                seq += 1
+    finally:
+        for _ in range(n_consumers):
+            out_queue.put(None)
+        ring.close()
+
+
+def _detect_worker(config, ring_args, in_queue, out_queue, counters, row):
+    from auto_typing.phase1.localizer import Phase1KeyboardLocalization
+    ring = SharedFrameRing.attach(*ring_args)
+    localizer = Phase1KeyboardLocalization(config)
+    stats = StageCounters(counters, row)
+    try:
+        localizer.warm_up(ring.shape[:2], ocr=True)
+        while True:
+            item = in_queue.get()
+            if item is None:
+                break
+            seq, slot, frame_id, captured_ns, _ = item
+            start = time.perf_counter_ns()
+            localizer.frame_id = frame_id
+            text_boxes = localizer.detect_text_regions(ring[slot])
+            out_queue.put((seq, slot, frame_id, captured_ns, text_boxes))
+            stats.record(time.perf_counter_ns() - start, captured_ns)
+    finally:
+        out_queue.put(None)
+        localizer.ocr.close()
+        localizer.close()
+        ring.close()
+
+
+def _pose_worker(config, ring_args, in_queue, free_slots, result_queue, counters, row, n_producers, translation_m):
+    from auto_typing.phase1.localizer import Phase1KeyboardLocalization
+    from auto_typing.phase1.frame import FrameContext
+    ring = SharedFrameRing.attach(*ring_args)
+    localizer = Phase1KeyboardLocalization(config)
+    stats = StageCounters(counters, row)
+    # Detect workers finish out of order; depth from flow needs consecutive frames, so restore capture order
+    pending = {}
+    next_seq = 0
+    prev, prev_frame = None, None
+    finished = 0
+    try:
+        while finished < n_producers:
+            item = in_queue.get()
+            if item is None:
+                finished += 1
+                continue
+            pending[item[0]] = item
+            while next_seq in pending:
+                seq, slot, frame_id, captured_ns, text_boxes = pending.pop(next_seq)
+                start = time.perf_counter_ns()
+                localizer.frame_id = frame_id
+                normal, points = None, 0
+                frame = FrameContext(ring[slot])
+                if prev is not None:
+                    _, _, depth_map = localizer.estimate_depth_from_flow(prev_frame, frame, translation_m,
+                                                                         return_depth_map=True)
+                    points_3d = localizer.compute_3d_points_from_text(prev[4], depth_map)
+                    points = len(points_3d)
+                    try:
+                        normal, _ = localizer.compute_keyboard_pose(localizer.fit_plane_svm(points_3d))
+                    except ValueError as e:
+                        localizer.log("Frame %d: no pose (%s)", frame_id, e)
+                    # The earlier frame of the pair is done; hand its slot back to capture
+                    free_slots.put(prev[1])
+                prev, prev_frame = (seq, slot, frame_id, captured_ns, text_boxes), frame
+                next_seq += 1
+                stats.record(time.perf_counter_ns() - start, captured_ns)
+                result_queue.put({'frame_id': frame_id,
+                                  'keys': len(text_boxes['text']),
+                                  'points': points,
+                                  'normal': None if normal is None else normal.tolist(),
+                                  'latency_ms': (time.monotonic_ns() - captured_ns) / 1e6})
+    finally:
+        if prev is not None:
+            free_slots.put(prev[1])
+        result_queue.put(None)
+        localizer.close()
+        ring.close()
+
+
+class VisionPipeline:
+    def __init__(self, config, source=None, detect_workers=2, slots=8, translation_m=0.01, max_frames=None,
+                 frame_shape=None):
+        if slots < detect_workers + 3:
+            raise ValueError("Need at least detect_workers + 3 slots: one per OCR worker, a pose pair and one to capture into")
+        self.config = config
+        self.source = source
+        self.detect_workers = detect_workers
+        self.slots = slots
+        self.translation_m = translation_m
+        self.max_frames = max_frames
+        self.frame_shape = frame_shape
+        self.ring = None
+        self.processes = []
+        self._ctx = mp.get_context('spawn')
+        self._queues = []
+        self._results = None
+        self._start_time = None
+        self._stop_time = None
+
+    @classmethod
+    def from_config(cls, config, source=None, max_frames=None):
+        pipeline = config.get('pipeline', {})
+        shape = pipeline.get('frame_shape')
+        return cls(config, source,
+                   detect_workers=pipeline.get('detect_workers', 2),
+                   slots=pipeline.get('slots', 8),
+                   translation_m=pipeline.get('translation_m', 0.01),
+                   max_frames=max_frames,
+                   frame_shape=tuple(shape) if shape else None)
+
+    def _probe_frame_shape(self):
+        from auto_typing.utils.frame_source import FrameSource
+        with FrameSource.from_config(self.config, self.source) as frames:
+            frame, _, _ = frames.read(timeout=5.0)
+        if frame is None:
+            raise RuntimeError(f"Frame source {self.source!r} produced no frames")
+        return frame.shape
+
+    def start(self):
+        if self.frame_shape is None:
+            self.frame_shape = self._probe_frame_shape()
+        self.ring = SharedFrameRing(self.frame_shape, self.slots)
+        ring_args = self.ring.attach_args()
+        ctx = self._ctx
+
+        # Queues stay referenced on self: a spawned child rebuilds their semaphores by name after start() returns
+        self._queues = [ctx.Queue(), ctx.Queue(maxsize=self.slots), ctx.Queue(maxsize=self.slots)]
+        free_slots, to_detect, to_pose = self._queues
+        for slot in range(self.slots):
+            free_slots.put(slot)
+        self._results = ctx.Queue()
+
+        # Rows: capture, one per detect worker, pose
+        self.stage_rows = {'capture': [0], 'detect': list(range(1, self.detect_workers + 1)),
+                           'pose': [self.detect_workers + 1]}
+        self.counters = ctx.Array(ctypes.c_int64, (self.detect_workers + 2) * COUNTER_FIELDS, lock=False)
+
+        self.processes = [ctx.Process(target=_capture_worker, name='capture',
+                                      args=(self.config, self.source, ring_args, free_slots, to_detect,
+                                            self.counters, 0, self.max_frames, self.detect_workers))]
+        for i in range(self.detect_workers):
+            self.processes.append(ctx.Process(target=_detect_worker, name=f'detect-{i}',
+                                              args=(self.config, ring_args, to_detect, to_pose, self.counters, i + 1)))
+        self.processes.append(ctx.Process(target=_pose_worker, name='pose',
+                                          args=(self.config, ring_args, to_pose, free_slots, self._results,
+                                                self.counters, self.detect_workers + 1, self.detect_workers,
+                                                self.translation_m)))
+        for p in self.processes:
+            p.daemon = True
+            p.start()
+        self._start_time = time.perf_counter()
+        self._stop_time = None
+        return self
+
+    def results(self, poll_s=1.0):
+        # Yields one dict per frame in capture order until the stream ends
+        while True:
+            try:
+                item = self._results.get(timeout=poll_s)
+            except queue.Empty:
+                failed = [p.name for p in self.processes if p.exitcode not in (None, 0)]
+                if failed:
+                    raise RuntimeError(f"Pipeline worker(s) {failed} crashed before finishing the stream")
+                continue
+            if item is None:
+                self._stop_time = time.perf_counter()
+                # Workers send their end-of-stream sentinels even when they fail, so tell a crash apart from the end
+                for p in self.processes:
+                    p.join(poll_s)
+                failed = [p.name for p in self.processes if p.exitcode not in (None, 0)]
+                if failed:
+                    raise RuntimeError(f"Pipeline worker(s) {failed} crashed before finishing the stream")
+                return
+            yield item
+
+    def stop(self, timeout=5.0):
+        for p in self.processes:
+            p.join(timeout)
+            if p.is_alive():
+                p.terminate()
+                p.join()
+        self.processes = []
+        if self._stop_time is None and self._start_time is not None:
+            self._stop_time = time.perf_counter()
+        if self.ring is not None:
+            self.ring.close()
+            self.ring = None
+
+    def __enter__(self):
+        return self.start()
+
+    def __exit__(self, *exc):
+        self.stop()
+
+    def stats(self):
+        end = self._stop_time if self._stop_time is not None else time.perf_counter()
+        wall = max(end - self._start_time, 1e-9)
+        counters = np.frombuffer(self.counters, dtype=np.int64).reshape(-1, COUNTER_FIELDS)
+        report = {}
+        for stage in STAGES:
+            rows = counters[self.stage_rows[stage]]
+            frames = int(rows[:, 0].sum())
+            report[stage] = {
+                'workers': len(rows),
+                'frames': frames,
+                'fps': frames / wall,
+                # Summed over workers, so a value above 1.0 means the stage kept more than one core busy
+                'cores_busy': float(rows[:, 1].sum()) / 1e9 / wall,
+                'busy_ms_per_frame': float(rows[:, 1].sum()) / 1e6 / frames if frames else 0.0,
+                'latency_mean_ms': float(rows[:, 2].sum()) / 1e6 / frames if frames else 0.0,
+                'latency_max_ms': float(rows[:, 3].max()) / 1e6,
+            }
+        return report
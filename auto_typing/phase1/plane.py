@@ -0,0 +1,58 @@
+import numpy as np
+
+class PlaneModel:
+    def __init__(self, normal, offset, inliers=None):
+        # Plane is normal . p + offset = 0 with a unit normal facing the camera's +Z
+        self.normal = normal
+        self.offset = offset
+        self.inliers = inliers
+
+    def distance(self, points):
+        return np.abs(points @ self.normal + self.offset)
+
+    def predict_z(self, xy):
+        return -(xy @ self.normal[:2] + self.offset) / self.normal[2]
+
+
+def fit_plane_lstsq(points):
+    centroid = points.mean(axis=0)
+    _, _, vh = np.linalg.svd(points - centroid, full_matrices=False)
+    normal = vh[-1]
+    if normal[2] < 0:
+        normal = -normal
+    return PlaneModel(normal, -normal @ centroid)
+
+
+def fit_plane_ransac(points, threshold=None, iterations=256, seed=0):
+    points = np.asarray(points, dtype=np.float64)
+    n = points.shape[0]
+    if n < 3:
+        raise ValueError(f"Need at least 3 points to fit a plane, got {n}")
+
+    if threshold is None:
+        # Adapted from sklearn's RANSACRegressor default (MAD of y): here the MAD of least-squares plane residuals
+        residuals = fit_plane_lstsq(points).distance(points)
+        threshold = max(np.median(np.abs(residuals - np.median(residuals))), 1e-9)
+
+    # Score every hypothesis in one batch: (iterations, 3) samples -> (n, iterations) distances
+    rng = np.random.default_rng(seed)
+    samples = points[rng.integers(0, n, size=(iterations, 3))]
+    normals = np.cross(samples[:, 1] - samples[:, 0], samples[:, 2] - samples[:, 0])
+    norms = np.linalg.norm(normals, axis=1)
+    valid = norms > 1e-12
+    if not valid.any():
+        raise ValueError("All RANSAC samples are degenerate (collinear or repeated points)")
+    normals = normals[valid] / norms[valid, None]
+    offsets = -np.einsum('ij,ij->i', normals, samples[valid, 0])
+
+    distances = np.abs(points @ normals.T + offsets)
+    # MSAC cost: inliers pay their squared residual, outliers a constant
+    cost = np.minimum(distances, threshold) ** 2
+    best = np.argmin(cost.sum(axis=0))
+    inliers = distances[:, best] < threshold
+    if inliers.sum() < 3:
+        inliers = np.ones(n, dtype=bool)
+
+    model = fit_plane_lstsq(points[inliers])
+    model.inliers = model.distance(points) < threshold
+    return model
@@ -0,0 +1,114 @@
+import cv2
+import numpy as np
+
+def boxes_roi(text_boxes, shape, margin=20):
+    # Bounding (x, y, w, h) of all detected keys plus a margin, clipped to an image of the given shape
+    if not text_boxes['text']:
+        return None
+    left = np.asarray(text_boxes['left'])
+    top = np.asarray(text_boxes['top'])
+    x0 = max(int(left.min()) - margin, 0)
+    y0 = max(int(top.min()) - margin, 0)
+    x1 = min(int((left + np.asarray(text_boxes['width'])).max()) + margin, shape[1])
+    y1 = min(int((top + np.asarray(text_boxes['height'])).max()) + margin, shape[0])
+    return x0, y0, x1 - x0, y1 - y0
+
+
+class StereoDepth:
+    def __init__(self, focal_length, baseline, algorithm='bm', num_disparities=16, block_size=15, pyramid_level=0):
+        if algorithm not in ('bm', 'sgbm'):
+            raise ValueError(f"Unknown stereo algorithm '{algorithm}', expected 'bm' or 'sgbm'")
+        self.focal_length = focal_length
+        self.baseline = baseline
+        self.algorithm = algorithm
+        # Disparity range and block size are given at full resolution and scaled per pyramid level
+        self.num_disparities = num_disparities
+        self.block_size = block_size
+        self.pyramid_level = pyramid_level
+        self._matchers = {}
+        self._buffers = {}
+
+    @classmethod
+    def from_config(cls, config):
+        depth = config['depth']
+        return cls(depth['focal_length'], depth['baseline'],
+                   algorithm=depth.get('matcher', 'bm'),
+                   num_disparities=depth.get('num_disparities', 16),
+                   block_size=depth.get('block_size', 15),
+                   pyramid_level=depth.get('pyramid_level', 0))
+
+    def matcher(self, level=0):
+        if level not in self._matchers:
+            num_disparities = max(16, int(np.ceil(self.num_disparities / 2 ** level / 16)) * 16)
+            block_size = max(5, (self.block_size >> level) | 1)
+            if self.algorithm == 'bm':
+                matcher = cv2.StereoBM_create(numDisparities=num_disparities, blockSize=block_size)
+            else:
+                matcher = cv2.StereoSGBM_create(minDisparity=0, numDisparities=num_disparities, blockSize=block_size,
+                                                P1=8 * block_size ** 2, P2=32 * block_size ** 2,
+                                                mode=cv2.STEREO_SGBM_MODE_SGBM_3WAY)
+            self._matchers[level] = matcher
+        return self._matchers[level]
+
+    def _buffer(self, name, shape, dtype=np.float32):
+        buf = self._buffers.get(name)
+        if buf is None or buf.shape != shape:
+            buf = self._buffers[name] = np.empty(shape, dtype)
+        return buf
+
+    def disparity(self, left, right, roi=None, level=None, out=None):
+        # Disparity in full-resolution pixels (0 = no match); only the roi (x, y, w, h) is computed.
+        # The default output buffer is reused, so the result is overwritten by the next call
+        level = self.pyramid_level if level is None else level
+        if left.ndim == 3:
+            left = cv2.cvtColor(left, cv2.COLOR_BGR2GRAY, dst=self._buffer('left_gray', left.shape[:2], np.uint8))
+            right = cv2.cvtColor(right, cv2.COLOR_BGR2GRAY, dst=self._buffer('right_gray', right.shape[:2], np.uint8))
+        h, w = left.shape
+        x, y, rw, rh = (0, 0, w, h) if roi is None else roi
+        if out is None:
+            out = self._buffer('disparity', (h, w))
+        out.fill(0)
+
+        # The matcher searches leftwards from each pixel, so the crop needs the full disparity range on the left
+        # plus half a block all round; the crop is also aligned to the pyramid step
+        scale = 2 ** level
+        pad = self.block_size // 2 + 1
+        x0 = max(x - self.num_disparities - pad, 0) // scale * scale
+        y0 = max(y - pad, 0) // scale * scale
+        x1 = min(x + rw + pad, w)
+        y1 = min(y + rh + pad, h)
+        crop_l, crop_r = left[y0:y1, x0:x1], right[y0:y1, x0:x1]
+        for _ in range(level):
+            crop_l, crop_r = cv2.pyrDown(crop_l), cv2.pyrDown(crop_r)
+
+        raw = self.matcher(level).compute(crop_l, crop_r)
+        # Fixed point with 4 fractional bits at the pyramid level; negative values mark invalid pixels
+        disparity = raw.astype(np.float32)
+        disparity *= scale / 16.0
+        np.maximum(disparity, 0, out=disparity)
+        if level > 0:
+            # Nearest neighbour so invalid pixels are not blended into their neighbours
+            disparity = cv2.resize(disparity, (x1 - x0, y1 - y0), interpolation=cv2.INTER_NEAREST)
+        out[y:y + rh, x:x + rw] = disparity[y - y0:y - y0 + rh, x - x0:x - x0 + rw]
+        return out
+
+    def depth(self, disparity, roi=None, out=None):
+        # Depth in meters inside the roi (0 where the disparity is invalid or outside the roi)
+        h, w = disparity.shape
+        x, y, rw, rh = (0, 0, w, h) if roi is None else roi
+        if out is None:
+            out = self._buffer('depth', (h, w))
+        out.fill(0)
+        d = disparity[y:y + rh, x:x + rw]
+        np.divide(self.focal_length * self.baseline, d, out=out[y:y + rh, x:x + rw], where=d > 0)
+        return out
+
+    def depth_at(self, disparity, points):
+        # Depth at (N, 2) pixel positions without touching the rest of the frame
+        points = np.rint(np.asarray(points, np.float64).reshape(-1, 2)).astype(np.intp)
+        cols = np.clip(points[:, 0], 0, disparity.shape[1] - 1)
+        rows = np.clip(points[:, 1], 0, disparity.shape[0] - 1)
+        d = disparity[rows, cols]
+        depth = np.zeros(len(d), np.float32)
+        np.divide(self.focal_length * self.baseline, d, out=depth, where=d > 0)
+        return depth
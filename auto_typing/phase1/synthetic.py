@@ -0,0 +1,126 @@
+import cv2
+import numpy as np
+from auto_typing.phase1.layout import KEY_POSITIONS
+
+def rotation_matrix(pitch, yaw, roll):
+    # Radians; pitch about camera X (negative tilts the top row away), yaw about Y, roll about Z
+    cx, sx = np.cos(pitch), np.sin(pitch)
+    cy, sy = np.cos(yaw), np.sin(yaw)
+    cz, sz = np.cos(roll), np.sin(roll)
+    rx = np.array([[1, 0, 0], [0, cx, -sx], [0, sx, cx]])
+    ry = np.array([[cy, 0, sy], [0, 1, 0], [-sy, 0, cy]])
+    rz = np.array([[cz, -sz, 0], [sz, cz, 0], [0, 0, 1]])
+    return rx @ ry @ rz
+
+
+class SyntheticScene:
+    def __init__(self, camera_matrix, image_size, rotation, translation, camera_shift_m,
+                 key_positions=KEY_POSITIONS, key_size_mm=15.0):
+        self.camera_matrix = np.asarray(camera_matrix, np.float64)
+        self.image_size = tuple(image_size)
+        self.rotation = rotation
+        self.translation = np.asarray(translation, np.float64)
+        # Camera moves left by this much between the frames, so keys shift right by f * shift / Z
+        self.camera_shift_m = camera_shift_m
+        self.key_positions = key_positions
+        self.key_size_mm = key_size_mm
+        xy = np.array([p[:2] for p in key_positions.values()], np.float64)
+        # Keyboard frame: origin at the layout center, meters, X right, Y down (layout y points up)
+        self.center_mm = (xy.min(axis=0) + xy.max(axis=0)) / 2
+
+    @property
+    def normal(self):
+        # Plane normal in camera coordinates, facing the camera like PlaneModel's
+        normal = self.rotation[:, 2]
+        return normal if normal[2] > 0 else -normal
+
+    def plane_to_image(self, shift_m=0.0):
+        # Homography from keyboard-frame meters (x, y, 1) to pixels
+        t = self.translation + np.array([shift_m, 0.0, 0.0])
+        return self.camera_matrix @ np.column_stack([self.rotation[:, 0], self.rotation[:, 1], t])
+
+    def mm_to_plane(self, mm):
+        mm = np.asarray(mm, np.float64).reshape(-1, 2)
+        return np.column_stack([(mm[:, 0] - self.center_mm[0]) / 1000.0, -(mm[:, 1] - self.center_mm[1]) / 1000.0])
+
+    def project(self, mm, shift_m=0.0):
+        plane = self.mm_to_plane(mm)
+        projected = np.column_stack([plane, np.ones(len(plane))]) @ self.plane_to_image(shift_m).T
+        return projected[:, :2] / projected[:, 2:3]
+
+    def key_centers(self):
+        keys = list(self.key_positions)
+        return keys, self.project([self.key_positions[k][:2] for k in keys])
+
+    def key_boxes(self):
+        # Ground-truth text boxes in the localizer's Tesseract-style format
+        half = self.key_size_mm / 2
+        text_boxes = {'left': [], 'top': [], 'width': [], 'height': [], 'conf': [], 'text': []}
+        for key, (x, y, _) in self.key_positions.items():
+            corners = self.project([(x - half, y - half), (x + half, y - half), (x + half, y + half), (x - half, y + half)])
+            x0, y0 = np.floor(corners.min(axis=0)).astype(int)
+            x1, y1 = np.ceil(corners.max(axis=0)).astype(int)
+            text_boxes['left'].append(int(x0))
+            text_boxes['top'].append(int(y0))
+            text_boxes['width'].append(int(x1 - x0))
+            text_boxes['height'].append(int(y1 - y0))
+            text_boxes['conf'].append(95)
+            text_boxes['text'].append(key.upper())
+        return text_boxes
+
+    def depth_at(self, pixels):
+        # True Z of the keyboard plane along each pixel ray of the first frame
+        pixels = np.asarray(pixels, np.float64).reshape(-1, 2)
+        rays = np.column_stack([pixels, np.ones(len(pixels))]) @ np.linalg.inv(self.camera_matrix).T
+        n = self.rotation[:, 2]
+        return (n @ self.translation) / (rays @ n)
+
+    def render_texture(self, px_per_mm=4, seed=0):
+        # Keyboard texture in layout mm: dark case with speckle (for feature tracking), keycaps with white letters
+        rng = np.random.default_rng(seed)
+        xy = np.array([p[:2] for p in self.key_positions.values()])
+        margin = self.key_size_mm
+        origin = xy.min(axis=0) - margin
+        size_mm = xy.max(axis=0) + margin - origin
+        w, h = np.ceil(size_mm * px_per_mm).astype(int)
+        texture = np.full((h, w), 45, np.uint8)
+        speckle = rng.random((h, w)) < 0.15
+        texture[speckle] = rng.integers(80, 140, speckle.sum())
+        texture = cv2.GaussianBlur(texture, (3, 3), 0)
+
+        half = self.key_size_mm / 2 * px_per_mm
+        for key, (x, y, _) in self.key_positions.items():
+            u = (x - origin[0]) * px_per_mm
+            v = (origin[1] + size_mm[1] - y) * px_per_mm
+            cv2.rectangle(texture, (int(u - half), int(v - half)), (int(u + half), int(v + half)), 25, -1)
+            # Letters about 7 mm tall
+            scale, thickness = 0.3 * px_per_mm, max(2, px_per_mm // 2)
+            (tw, th), _ = cv2.getTextSize(key.upper(), cv2.FONT_HERSHEY_SIMPLEX, scale, thickness)
+            cv2.putText(texture, key.upper(), (int(u - tw / 2), int(v + th / 2)), cv2.FONT_HERSHEY_SIMPLEX,
+                        scale, 235, thickness, cv2.LINE_AA)
+
+        # Texture pixel (u, v) -> layout mm -> keyboard-frame meters
+        to_mm = np.array([[1 / px_per_mm, 0, origin[0]], [0, -1 / px_per_mm, origin[1] + size_mm[1]], [0, 0, 1]])
+        to_plane = np.array([[1 / 1000.0, 0, -self.center_mm[0] / 1000.0],
+                             [0, -1 / 1000.0, self.center_mm[1] / 1000.0], [0, 0, 1]])
+        return texture, to_plane @ to_mm
+
+    def render(self, px_per_mm=4, seed=0, noise=2.0):
+        # Two BGR frames: before and after the camera shift
+        texture, texture_to_plane = self.render_texture(px_per_mm, seed)
+        rng = np.random.default_rng(seed + 1)
+        frames = []
+        for shift in (0.0, self.camera_shift_m):
+            H = self.plane_to_image(shift) @ texture_to_plane
+            gray = cv2.warpPerspective(texture, H, self.image_size, flags=cv2.INTER_LINEAR, borderValue=90)
+            gray = np.clip(gray + rng.normal(0, noise, gray.shape), 0, 255).astype(np.uint8)
+            frames.append(cv2.cvtColor(gray, cv2.COLOR_GRAY2BGR))
+        return frames
+
+
+def random_scene(camera_matrix, image_size, rng, distance_m=(0.30, 0.40), pitch_deg=(20, 45), yaw_deg=10,
+                 roll_deg=5, camera_shift_m=0.004, key_positions=KEY_POSITIONS):
+    rotation = rotation_matrix(-np.radians(rng.uniform(*pitch_deg)), np.radians(rng.uniform(-yaw_deg, yaw_deg)),
+                               np.radians(rng.uniform(-roll_deg, roll_deg)))
+    translation = np.array([rng.uniform(-0.02, 0.02), rng.uniform(0.0, 0.04), rng.uniform(*distance_m)])
+    return SyntheticScene(camera_matrix, image_size, rotation, translation, camera_shift_m, key_positions)
@@ -0,0 +1,122 @@
+import cv2
+import numpy as np
+from auto_typing.phase1.frame import FrameContext
+
+class KeyboardTracker:
+    def __init__(self, localizer, keyframe_interval=30, min_confidence=0.5, min_points=15, ransac_threshold=3.0):
+        self.localizer = localizer
+        self.keyframe_interval = keyframe_interval
+        self.min_confidence = min_confidence
+        self.min_points = min_points
+        self.ransac_threshold = ransac_threshold
+        self.reset()
+
+    @classmethod
+    def from_config(cls, localizer, config):
+        tracking = config.get('tracking', {})
+        return cls(localizer,
+                   keyframe_interval=tracking.get('keyframe_interval', 30),
+                   min_confidence=tracking.get('min_confidence', 0.5),
+                   min_points=tracking.get('min_points', 15),
+                   ransac_threshold=tracking.get('ransac_threshold', 3.0))
+
+    def reset(self):
+        self.frame_index = 0
+        self.frames_since_keyframe = 0
+        self.is_keyframe = False
+        self.confidence = 0.0
+        self.homography = np.eye(3)
+        self.text_boxes = None
+        self._prev_gray = None
+        self._prev_pts = None
+        self._keyframe_point_count = 0
+        self._key_corners = np.empty((0, 4, 2), np.float32)
+        self._key_text = []
+        self._key_conf = []
+
+    def update(self, image):
+        # A fresh context per frame: the previous gray image must survive until the next LK step
+        frame = FrameContext(image.image if isinstance(image, FrameContext) else image)
+        gray = frame.gray
+        self.frame_index += 1
+        self.localizer.frame_id = self.frame_index
+
+        if self._prev_gray is None or self.frames_since_keyframe >= self.keyframe_interval:
+            return self._keyframe(frame, gray)
+
+        if not self._track(gray):
+            self.localizer.log("Tracking confidence %.2f too low, re-detecting keys.", self.confidence)
+            return self._keyframe(frame, gray)
+
+        self.is_keyframe = False
+        self.frames_since_keyframe += 1
+        self._prev_gray = gray
+        self.text_boxes = self._project_boxes()
+        return self.text_boxes
+
+    def _keyframe(self, frame, gray):
+        self.localizer.log("Keyframe %d: running full key detection.", self.frame_index)
+        text_boxes = self.localizer.detect_text_regions(frame)
+        pts = self.localizer.detect_features(frame)
+
+        corners = []
+        for x, y, w, h in zip(text_boxes['left'], text_boxes['top'], text_boxes['width'], text_boxes['height']):
+            corners.append([(x, y), (x + w, y), (x + w, y + h), (x, y + h)])
+        self._key_corners = np.array(corners, np.float32).reshape(-1, 4, 2)
+        self._key_text = list(text_boxes['text'])
+        self._key_conf = list(text_boxes['conf'])
+
+        self._prev_gray = gray
+        self._prev_pts = pts if pts is not None else np.empty((0, 1, 2), np.float32)
+        self._keyframe_point_count = len(self._prev_pts)
+        self.homography = np.eye(3)
+        self.confidence = 1.0
+        self.is_keyframe = True
+        self.frames_since_keyframe = 0
+        self.text_boxes = text_boxes
+        return text_boxes
+
+    def _track(self, gray):
+        if len(self._prev_pts) < self.min_points:
+            self.confidence = 0.0
+            return False
+
+        next_pts, status, _ = cv2.calcOpticalFlowPyrLK(self._prev_gray, gray, self._prev_pts, None)
+        good = status.ravel() == 1
+        prev_pts, next_pts = self._prev_pts[good], next_pts[good]
+        if len(next_pts) < self.min_points:
+            self.confidence = 0.0
+            return False
+
+        step, inliers = cv2.findHomography(prev_pts, next_pts, cv2.RANSAC, self.ransac_threshold)
+        if step is None:
+            self.confidence = 0.0
+            return False
+
+        inliers = inliers.ravel().astype(bool)
+        # Confidence is the share of keyframe features still following the keyboard plane
+        self.confidence = inliers.sum() / max(self._keyframe_point_count, 1)
+        if self.confidence < self.min_confidence or inliers.sum() < self.min_points:
+            return False
+
+        self.homography = step @ self.homography
+        self._prev_pts = next_pts[inliers].reshape(-1, 1, 2)
+        return True
+
+    def _project_boxes(self):
+        text_boxes = {'left': [], 'top': [], 'width': [], 'height': [], 'conf': [], 'text': []}
+        if len(self._key_corners) == 0:
+            return text_boxes
+
+        corners = cv2.perspectiveTransform(self._key_corners.reshape(-1, 1, 2), self.homography)
+        corners = corners.reshape(-1, 4, 2)
+        mins = np.rint(corners.min(axis=1)).astype(int)
+        maxs = np.rint(corners.max(axis=1)).astype(int)
+        for (x0, y0), (x1, y1), char, conf in zip(mins, maxs, self._key_text, self._key_conf):
+            text_boxes['left'].append(int(x0))
+            text_boxes['top'].append(int(y0))
+            text_boxes['width'].append(int(x1 - x0))
+            text_boxes['height'].append(int(y1 - y0))
+            text_boxes['conf'].append(conf)
+            text_boxes['text'].append(char)
+        return text_boxes
@@ -0,0 +1,220 @@
+import time
+import threading
+import cv2
+import numpy as np
+from pathlib import Path
+from auto_typing.utils.recording import FrameRecording, RECORDING_SUFFIX
+
+IMAGE_SUFFIXES = ('.jpg', '.jpeg', '.png', '.bmp')
+
+class FrameSource:
+    def __init__(self, source=0, buffer_size=4, fps=None, drop_frames=True, loop=False):
+        # source: camera index, video file, frame recording or directory of images (played in name order)
+        if buffer_size < 2:
+            raise ValueError("buffer_size must be at least 2 so capture never writes the slot being read")
+        self.source = source
+        self.buffer_size = buffer_size
+        self.fps = fps
+        self.drop_frames = drop_frames
+        self.loop = loop
+
+        self.captured = 0
+        self.delivered = 0
+        self.dropped = 0
+
+        self._ring = None
+        self._timestamps = np.zeros(buffer_size, dtype=np.float64)
+        # Frame id handed out per slot: the capture sequence number, or the recorded id when replaying a .rec file
+        self._frame_ids = np.full(buffer_size, -1, dtype=np.int64)
+        self._latest_id = -1
+        self._last_read_id = -1
+        self._cond = threading.Condition()
+        self._running = False
+        self._finished = False
+        self._error = None
+        self._thread = None
+        self._capture = None
+        self._images = None
+        self._recording = None
+        self._recorded_timestamp = None
+        self._recorded_frame_id = None
+
+    @classmethod
+    def from_config(cls, config, source=None):
+        capture = config.get('capture', {})
+        return cls(capture.get('source', 0) if source is None else source,
+                   buffer_size=capture.get('buffer_size', 4),
+                   fps=capture.get('fps'),
+                   drop_frames=capture.get('drop_frames', True))
+
+    def start(self):
+        if self._running:
+            return self
+        self._open()
+        self._running = True
+        self._finished = False
+        self._thread = threading.Thread(target=self._capture_loop, name='FrameSource', daemon=True)
+        self._thread.start()
+        return self
+
+    def stop(self):
+        with self._cond:
+            self._running = False
+            self._cond.notify_all()
+        if self._thread is not None:
+            self._thread.join()
+            self._thread = None
+        if self._capture is not None:
+            self._capture.release()
+            self._capture = None
+        if self._recording is not None:
+            self._recording.close()
+            self._recording = None
+
+    def __enter__(self):
+        return self.start()
+
+    def __exit__(self, *exc):
+        self.stop()
+
+    @property
+    def frame_size(self):
+        # (width, height) once the first frame has arrived
+        return None if self._ring is None else (self._ring.shape[2], self._ring.shape[1])
+
+    def read(self, timeout=1.0, out=None):
+        # Newest frame not yet handed out: (frame, timestamp, frame_id), or (None, None, None) at end of stream
+        deadline = time.monotonic() + timeout if timeout is not None else None
+        with self._cond:
+            while self._latest_id <= self._last_read_id:
+                if self._error is not None:
+                    raise self._error
+                if self._finished or not self._running:
+                    return None, None, None
+                remaining = None if deadline is None else deadline - time.monotonic()
+                if remaining is not None and remaining <= 0:
+                    raise TimeoutError(f"No new frame from {self.source!r} within {timeout} s")
+                self._cond.wait(remaining)
+
+            frame_id = self._latest_id if self.drop_frames else self._last_read_id + 1
+            slot = frame_id % self.buffer_size
+            if out is None:
+                frame = self._ring[slot].copy()
+            else:
+                np.copyto(out, self._ring[slot])
+                frame = out
+            timestamp = float(self._timestamps[slot])
+            source_id = int(self._frame_ids[slot])
+            if frame_id > self._last_read_id + 1:
+                self.dropped += frame_id - self._last_read_id - 1
+            self._last_read_id = frame_id
+            self.delivered += 1
+            self._cond.notify_all()
+        return frame, timestamp, source_id
+
+    def stats(self):
+        with self._cond:
+            return {'captured': self.captured, 'delivered': self.delivered, 'dropped': self.dropped}
+
+    def _open(self):
+        if isinstance(self.source, int):
+            self._capture = cv2.VideoCapture(self.source)
+        else:
+            path = Path(self.source)
+            if path.is_dir():
+                self._images = sorted(p for p in path.iterdir() if p.suffix.lower() in IMAGE_SUFFIXES)
+                if not self._images:
+                    raise FileNotFoundError(f"No images found in {path}")
+                return
+            if path.suffix == RECORDING_SUFFIX:
+                self._recording = FrameRecording(path)
+                if not len(self._recording):
+                    raise FileNotFoundError(f"No frames in recording {path}")
+                # Replay exists to drive the localizer reproducibly: every recorded frame, in order
+                self.drop_frames = False
+                return
+            self._capture = cv2.VideoCapture(str(path))
+            if self.fps is None:
+                self.fps = self._capture.get(cv2.CAP_PROP_FPS) or None
+        if not self._capture.isOpened():
+            raise RuntimeError(f"Failed to open frame source {self.source!r}")
+
+    def _grab(self, slot):
+        if self._images is not None:
+            index = self.captured % len(self._images) if self.loop else self.captured
+            if index >= len(self._images):
+                return False
+            image = cv2.imread(str(self._images[index]), cv2.IMREAD_COLOR)
+            if image is None:
+                return False
+            self._ensure_ring(image.shape)
+            np.copyto(self._ring[slot], image)
+            return True
+
+        if self._recording is not None:
+            # Raw frames: one copy out of the mapping, nothing to decode; keep the recorded capture time
+            index = self.captured % len(self._recording) if self.loop else self.captured
+            if index >= len(self._recording):
+                return False
+            image = self._recording[index]
+            self._ensure_ring(image.shape)
+            np.copyto(self._ring[slot], image)
+            self._recorded_timestamp = float(self._recording.timestamps[index])
+            self._recorded_frame_id = int(self._recording.records['frame_id'][index])
+            return True
+
+        if self._ring is None:
+            ok, image = self._capture.read()
+            if not ok:
+                return False
+            self._ensure_ring(image.shape)
+            np.copyto(self._ring[slot], image)
+            return True
+        # Decode straight into the preallocated slot
+        ok, _ = self._capture.read(self._ring[slot])
+        if not ok and self.loop and not isinstance(self.source, int):
+            self._capture.set(cv2.CAP_PROP_POS_FRAMES, 0)
+            ok, _ = self._capture.read(self._ring[slot])
+        return ok
+
+    def _ensure_ring(self, shape):
+        # Allocated once, from the first frame; read() may be copying a slot, so the ring never changes after that
+        if self._ring is None:
+            dtype = np.uint8 if self._recording is None else self._recording.dtype
+            with self._cond:
+                self._ring = np.empty((self.buffer_size,) + shape, dtype=dtype)
+        elif self._ring.shape[1:] != shape:
+            raise ValueError(f"Frame shape changed from {self._ring.shape[1:]} to {shape} in {self.source!r}")
+
+    def _capture_loop(self):
+        period = 1.0 / self.fps if self.fps and not isinstance(self.source, int) else None
+        next_time = time.perf_counter()
+        try:
+            while self._running:
+                frame_id = self._latest_id + 1
+                with self._cond:
+                    # Without dropping, wait until the reader has freed the slot we are about to overwrite
+                    while (not self.drop_frames and self._running
+                           and frame_id - self._last_read_id > self.buffer_size):
+                        self._cond.wait(0.1)
+                    if not self._running:
+                        break
+                slot = frame_id % self.buffer_size
+                if not self._grab(slot):
+                    break
+                timestamp = time.time() if self._recording is None else self._recorded_timestamp
+                with self._cond:
+                    self._timestamps[slot] = timestamp
+                    self._frame_ids[slot] = frame_id if self._recording is None else self._recorded_frame_id
+                    self._latest_id = frame_id
+                    self.captured += 1
+                    self._cond.notify_all()
+                if period is not None:
+                    next_time += period
+                    time.sleep(max(0.0, next_time - time.perf_counter()))
+        except Exception as e:
+            self._error = e
+        finally:
+            with self._cond:
+                self._finished = True
+                self._cond.notify_all()
@@ -0,0 +1,140 @@
+import time
+import numpy as np
+
+class Span:
+    __slots__ = ('profiler', 'name', 'start_ns', 'duration_ns', '_capturing')
+
+    def __init__(self, profiler, name):
+        self.profiler = profiler
+        self.name = name
+        self.duration_ns = 0
+
+    def __enter__(self):
+        self._capturing = self.profiler.capture_stage == self.name
+        if self._capturing:
+            self.profiler._start_capture()
+        self.start_ns = time.perf_counter_ns()
+        return self
+
+    def __exit__(self, *exc):
+        self.duration_ns = time.perf_counter_ns() - self.start_ns
+        profiler = self.profiler
+        if self._capturing:
+            profiler._stop_capture()
+        profiler.record(self.name, self.start_ns, self.duration_ns)
+        for sink in profiler.sinks:
+            sink(self.name, self.duration_ns)
+        return False
+
+
+class StageProfiler:
+    def __init__(self, capacity=4096):
+        # Ring buffer of the last `capacity` spans: stage index, start and duration in ns
+        self.capacity = capacity
+        self._stage = np.zeros(capacity, np.int32)
+        self._start = np.zeros(capacity, np.int64)
+        self._duration = np.zeros(capacity, np.int64)
+        self.stages = []
+        self._stage_ids = {}
+        self.count = 0
+        # Called with (stage, duration_ns) after every span, e.g. to forward timings to a run log
+        self.sinks = []
+        self.capture_stage = None
+        self.capture_mode = None
+        self.profile = None
+        self.memory_peaks = []
+        self.memory_diff = None
+
+    def span(self, name):
+        return Span(self, name)
+
+    def record(self, name, start_ns, duration_ns):
+        stage_id = self._stage_ids.get(name)
+        if stage_id is None:
+            stage_id = self._stage_ids[name] = len(self.stages)
+            self.stages.append(name)
+        i = self.count % self.capacity
+        self._stage[i] = stage_id
+        self._start[i] = start_ns
+        self._duration[i] = duration_ns
+        self.count += 1
+
+    def reset(self):
+        self.count = 0
+        self.profile = None
+        self.memory_peaks = []
+        self.memory_diff = None
+
+    def capture(self, stage, mode='cprofile'):
+        # Deep profile every call of one stage; the other stages keep paying only for the timestamps
+        if mode not in ('cprofile', 'tracemalloc'):
+            raise ValueError(f"Unknown capture mode '{mode}', expected 'cprofile' or 'tracemalloc'")
+        self.capture_stage = stage
+        self.capture_mode = mode
+
+    def _start_capture(self):
+        # cProfile and tracemalloc are only imported once a capture actually runs, to keep localizer import cheap
+        if self.capture_mode == 'cprofile':
+            import cProfile
+            if self.profile is None:
+                self.profile = cProfile.Profile()
+            self.profile.enable()
+        else:
+            import tracemalloc
+            if not tracemalloc.is_tracing():
+                tracemalloc.start(16)
+            tracemalloc.reset_peak()
+            self._memory_start = tracemalloc.get_traced_memory()[0]
+            self._snapshot = tracemalloc.take_snapshot()
+
+    def _stop_capture(self):
+        if self.capture_mode == 'cprofile':
+            self.profile.disable()
+        else:
+            import tracemalloc
+            current, peak = tracemalloc.get_traced_memory()
+            self.memory_peaks.append(peak - self._memory_start)
+            # Leave out the profiler's own bookkeeping
+            ignore = [tracemalloc.Filter(False, __file__), tracemalloc.Filter(False, tracemalloc.__file__)]
+            self.memory_diff = tracemalloc.take_snapshot().filter_traces(ignore).compare_to(
+                self._snapshot.filter_traces(ignore), 'lineno')
+
+    def durations(self):
+        # {stage: durations in ms} for the spans still in the ring
+        n = min(self.count, self.capacity)
+        stage, duration = self._stage[:n], self._duration[:n] / 1e6
+        return {name: duration[stage == i] for i, name in enumerate(self.stages) if np.any(stage == i)}
+
+    def summary(self):
+        return summarize(self.durations())
+
+    def capture_report(self, top=15):
+        if self.capture_mode == 'cprofile' and self.profile is not None:
+            import io
+            import pstats
+            out = io.StringIO()
+            pstats.Stats(self.profile, stream=out).sort_stats('cumulative').print_stats(top)
+            return out.getvalue()
+        if self.capture_mode == 'tracemalloc' and self.memory_peaks:
+            peaks = np.array(self.memory_peaks) / 1024
+            lines = [f"Peak allocation in '{self.capture_stage}': mean {peaks.mean():.1f} KiB, max {peaks.max():.1f} KiB"]
+            lines += [str(stat) for stat in self.memory_diff[:top]]
+            return '\n'.join(lines)
+        return ''
+
+
+def summarize(durations):
+    summary = {}
+    for stage, values in durations.items():
+        p50, p95, p99 = np.percentile(values, [50, 95, 99])
+        summary[stage] = {'count': len(values), 'mean_ms': float(values.mean()),
+                          'p50_ms': float(p50), 'p95_ms': float(p95), 'p99_ms': float(p99)}
+    return summary
+
+
+def format_summary(summary):
+    lines = [f"{'stage':>12} {'count':>6} {'mean':>9} {'p50':>9} {'p95':>9} {'p99':>9}  (ms)"]
+    for stage, s in sorted(summary.items(), key=lambda item: -item[1]['mean_ms'] * item[1]['count']):
+        lines.append(f"{stage:>12} {s['count']:>6} {s['mean_ms']:>9.2f} {s['p50_ms']:>9.2f} "
+                     f"{s['p95_ms']:>9.2f} {s['p99_ms']:>9.2f}")
+    return '\n'.join(lines)
@@ -0,0 +1,121 @@
+import time
+import numpy as np
+from pathlib import Path
+
+RECORDING_SUFFIX = '.rec'
+MAGIC = b'ATREC001'
+HEADER_SIZE = 4096
+PAGE_SIZE = 4096
+
+HEADER_DTYPE = np.dtype([
+    ('magic', 'S8'), ('version', '<u4'), ('height', '<u4'), ('width', '<u4'), ('channels', '<u4'),
+    ('dtype', 'S8'), ('capacity', '<u8'), ('count', '<u8'), ('index_offset', '<u8'), ('data_offset', '<u8'),
+])
+# One fixed-size index entry per frame: capture time, source frame id and the motor state at capture
+RECORD_DTYPE = np.dtype([
+    ('timestamp', '<f8'), ('frame_id', '<i8'), ('position_mm', '<f8'), ('velocity_mm_s', '<f8'), ('duty', '<f8'),
+])
+
+def _layout(capacity):
+    index_offset = HEADER_SIZE
+    data_offset = index_offset + capacity * RECORD_DTYPE.itemsize
+    # Frames start on a page boundary so every frame view is aligned
+    return index_offset, -(-data_offset // PAGE_SIZE) * PAGE_SIZE
+
+
+class FrameRecorder:
+    def __init__(self, path, frame_shape, dtype=np.uint8, capacity=65536):
+        # File layout: header | fixed-size index of `capacity` records | raw frames appended back to back
+        self.path = Path(path)
+        self.path.parent.mkdir(parents=True, exist_ok=True)
+        shape = tuple(frame_shape) + (1,) * (3 - len(frame_shape))
+        self.frame_shape = tuple(frame_shape)
+        self.dtype = np.dtype(dtype)
+        self.frame_nbytes = int(np.prod(shape)) * self.dtype.itemsize
+        index_offset, data_offset = _layout(capacity)
+
+        with self.path.open('wb') as f:
+            f.truncate(data_offset)
+        self._meta = np.memmap(self.path, dtype=np.uint8, mode='r+', shape=(data_offset,))
+        self.header = self._meta[:HEADER_DTYPE.itemsize].view(HEADER_DTYPE)[0:1]
+        self.header[0] = (MAGIC, 1, shape[0], shape[1], shape[2], self.dtype.str.encode(), capacity, 0,
+                          index_offset, data_offset)
+        self.index = self._meta[index_offset:index_offset + capacity * RECORD_DTYPE.itemsize].view(RECORD_DTYPE)
+        self.capacity = capacity
+        self.count = 0
+        # Unbuffered: frame bytes go from the array's memory straight to the OS
+        self._file = self.path.open('r+b', buffering=0)
+        self._file.seek(data_offset)
+
+    def __len__(self):
+        return self.count
+
+    def append(self, frame, timestamp=None, frame_id=None, position_mm=np.nan, velocity_mm_s=np.nan, duty=np.nan):
+        if self.count >= self.capacity:
+            raise RuntimeError(f"Recording {self.path} is full ({self.capacity} frames)")
+        if frame.shape != self.frame_shape or frame.dtype != self.dtype:
+            raise ValueError(f"Frame {frame.shape} {frame.dtype} does not match recording "
+                             f"{self.frame_shape} {self.dtype}")
+        self._file.write(np.ascontiguousarray(frame).data)
+        self.index[self.count] = (time.time() if timestamp is None else timestamp,
+                                  self.count if frame_id is None else frame_id, position_mm, velocity_mm_s, duty)
+        # Count last, so a reader never sees an index entry whose frame is not written yet
+        self.count += 1
+        self.header['count'] = self.count
+        return self.count - 1
+
+    def close(self):
+        if self._file is not None:
+            self._file.close()
+            self._file = None
+            self._meta.flush()
+            self.index = self.header = None
+            self._meta = None
+
+    def __enter__(self):
+        return self
+
+    def __exit__(self, *exc):
+        self.close()
+
+
+class FrameRecording:
+    def __init__(self, path):
+        self.path = Path(path)
+        self._mmap = np.memmap(self.path, dtype=np.uint8, mode='r')
+        header = self._mmap[:HEADER_DTYPE.itemsize].view(HEADER_DTYPE)[0]
+        if header['magic'] != MAGIC:
+            raise ValueError(f"{self.path} is not a frame recording")
+        self.count = int(header['count'])
+        channels = int(header['channels'])
+        self.frame_shape = (int(header['height']), int(header['width'])) + ((channels,) if channels > 1 else ())
+        self.dtype = np.dtype(header['dtype'].decode())
+        index_offset, data_offset = int(header['index_offset']), int(header['data_offset'])
+
+        # Everything below is a view into the mapping: no copies, no decoding
+        self.records = self._mmap[index_offset:index_offset + self.count * RECORD_DTYPE.itemsize].view(RECORD_DTYPE)
+        frame_nbytes = int(np.prod(self.frame_shape)) * self.dtype.itemsize
+        frames = self._mmap[data_offset:data_offset + self.count * frame_nbytes]
+        self.frames = frames.view(self.dtype).reshape((self.count,) + self.frame_shape)
+
+    def __len__(self):
+        return self.count
+
+    def __getitem__(self, i):
+        return self.frames[i]
+
+    def __iter__(self):
+        for i in range(self.count):
+            yield self.frames[i], self.records[i]
+
+    @property
+    def timestamps(self):
+        return self.records['timestamp']
+
+    @property
+    def motor_state(self):
+        return self.records[['position_mm', 'velocity_mm_s', 'duty']]
+
+    def close(self):
+        self.frames = self.records = None
+        self._mmap = None
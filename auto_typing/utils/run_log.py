@@ -0,0 +1,124 @@
+import json
+import time
+import queue
+import atexit
+import threading
+import numpy as np
+from pathlib import Path
+from datetime import datetime
+
+# Safe to format later on the writer thread; anything else is rendered when it is logged
+IMMUTABLE_ARGS = (str, bytes, int, float, complex, bool, type(None), np.generic)
+
+def _snapshot(args):
+    return tuple(a if isinstance(a, IMMUTABLE_ARGS) else str(a) for a in args)
+
+
+class RunLogger:
+    def __init__(self, path, enabled=True, batch_size=256):
+        self.path = Path(path)
+        self.enabled = enabled
+        self.batch_size = batch_size
+        self._queue = queue.SimpleQueue()
+        self._thread = None
+        if enabled:
+            self.path.parent.mkdir(parents=True, exist_ok=True)
+            self._thread = threading.Thread(target=self._run, name='RunLogger', daemon=True)
+            self._thread.start()
+            atexit.register(self.close)
+
+    def log(self, message, *args, stage=None, frame_id=None):
+        # Only the enqueue happens on the caller's thread; %-style args are formatted by the writer, except
+        # mutable ones (arrays, lists, dicts) which are rendered with str() now so later changes do not leak in
+        if self.enabled:
+            self._queue.put((time.time(), stage, frame_id, None, message, _snapshot(args)))
+
+    def record(self, stage, frame_id, duration_ns, message=None, *args):
+        if self.enabled:
+            self._queue.put((time.time(), stage, frame_id, duration_ns, message, _snapshot(args)))
+
+    def flush(self, timeout=None):
+        if self._thread is not None:
+            done = threading.Event()
+            self._queue.put(done)
+            deadline = None if timeout is None else time.monotonic() + timeout
+            # Poll so a writer that died can never leave us waiting forever
+            while not done.wait(0.1):
+                if not self._thread.is_alive() or (deadline is not None and time.monotonic() >= deadline):
+                    break
+
+    def close(self):
+        if self._thread is not None:
+            self.enabled = False
+            self._queue.put(None)
+            self._thread.join()
+            self._thread = None
+            atexit.unregister(self.close)
+
+    @staticmethod
+    def _format(item):
+        timestamp, stage, frame_id, duration_ns, message, args = item
+        record = {'time': datetime.fromtimestamp(timestamp).isoformat()}
+        if stage is not None:
+            record['stage'] = stage
+        if frame_id is not None:
+            record['frame'] = int(frame_id)
+        if duration_ns is not None:
+            record['duration_ms'] = duration_ns / 1e6
+        if message is not None:
+            record['message'] = message % args if args else message
+        return json.dumps(record) + '\n'
+
+    @staticmethod
+    def _format_raw(item, error):
+        timestamp, stage, frame_id, duration_ns, message, args = item
+        record = {'time': datetime.fromtimestamp(timestamp).isoformat()}
+        if stage is not None:
+            record['stage'] = str(stage)
+        if frame_id is not None:
+            record['frame'] = repr(frame_id)
+        record.update(message=str(message), args=[repr(a) for a in args], format_error=repr(error))
+        return json.dumps(record) + '\n'
+
+    def _run(self):
+        # The file stays open for the whole run; everything queued since the last write goes out in one batch
+        with self.path.open('a') as f:
+            while True:
+                batch = [self._queue.get()]
+                while len(batch) < self.batch_size:
+                    try:
+                        batch.append(self._queue.get_nowait())
+                    except queue.Empty:
+                        break
+                stop, waiting, lines = False, [], []
+                for item in batch:
+                    if item is None:
+                        stop = True
+                    elif isinstance(item, threading.Event):
+                        waiting.append(item)
+                    else:
+                        try:
+                            lines.append(self._format(item))
+                        except Exception as e:
+                            # A bad log() call (e.g. args not matching the format) must not take the writer down
+                            lines.append(self._format_raw(item, e))
+                f.write(''.join(lines))
+                f.flush()
+                for done in waiting:
+                    done.set()
+                if stop:
+                    return
+
+
+def read_records(path):
+    with Path(path).open('r') as f:
+        return [json.loads(line) for line in f if line.strip()]
+
+
+def stage_durations(records):
+    # {stage: durations in ms} from the timed records of one or more runs
+    durations = {}
+    for record in records:
+        if 'duration_ms' in record:
+            durations.setdefault(record['stage'], []).append(record['duration_ms'])
+    return {stage: np.array(values) for stage, values in durations.items()}
@@ -1,12 +1,76 @@
-
 import time
+import numpy as np
+
+class PeriodicScheduler:
+    def __init__(self, rate_hz, busy_wait_us=0, history=4096):
+        if rate_hz <= 0:
+            raise ValueError("rate_hz must be positive")
+        self.rate_hz = rate_hz
+        self.period_ns = int(round(1e9 / rate_hz))
+        self.busy_wait_ns = int(busy_wait_us * 1000)
+        # Lateness of the last `history` ticks for the p99; mean and max are running totals over the whole run
+        self._lateness_ns = np.zeros(history, dtype=np.int64)
+        self.reset()
+
+    def reset(self):
+        self.ticks = 0
+        self.missed = 0
+        self._lateness_sum_ns = 0
+        self._lateness_max_ns = 0
+
+    def run(self, func, duration_seconds=None, iterations=None, *args, **kwargs):
+        if duration_seconds is None and iterations is None:
+            raise ValueError("Give a duration_seconds or an iterations limit")
+        # Stats describe one run, so a reused scheduler starts from zero
+        self.reset()
+        start = time.perf_counter_ns()
+        end = start + int(duration_seconds * 1e9) if duration_seconds is not None else None
+        deadline = start
+
+        while iterations is None or self.ticks < iterations:
+            now = time.perf_counter_ns()
+            if end is not None and now >= end:
+                break
+            lateness = now - deadline
+            self._lateness_ns[self.ticks % len(self._lateness_ns)] = lateness
+            self._lateness_sum_ns += lateness
+            if lateness > self._lateness_max_ns:
+                self._lateness_max_ns = lateness
+            func(*args, **kwargs)
+            self.ticks += 1
+
+            # Deadlines are absolute, so an overrun is not carried into the following ticks
+            deadline += self.period_ns
+            now = time.perf_counter_ns()
+            if now > deadline:
+                skipped = (now - deadline) // self.period_ns + 1
+                self.missed += skipped
+                deadline += skipped * self.period_ns
+            if end is not None and deadline >= end:
+                break
+            self._sleep_until(deadline)
+        return self.stats()
+
+    def _sleep_until(self, deadline_ns):
+        remaining = deadline_ns - time.perf_counter_ns() - self.busy_wait_ns
+        if remaining > 0:
+            time.sleep(remaining / 1e9)
+        while time.perf_counter_ns() < deadline_ns:
+            pass
+
+    def stats(self):
+        if self.ticks == 0:
+            return {'ticks': 0, 'missed': self.missed, 'jitter_mean_us': 0.0, 'jitter_p99_us': 0.0, 'jitter_max_us': 0.0}
+        recent = self._lateness_ns[:min(self.ticks, len(self._lateness_ns))]
+        return {
+            'ticks': self.ticks,
+            'missed': self.missed,
+            'jitter_mean_us': self._lateness_sum_ns / self.ticks / 1000.0,
+            'jitter_p99_us': float(np.percentile(recent, 99)) / 1000.0,
+            'jitter_max_us': self._lateness_max_ns / 1000.0,
+        }
+
 
 def run_for_duration(duration_seconds, func, rate_hz=10, *args, **kwargs):
-    interval = 1.0 / rate_hz
-    start_time = time.time()
-    while time.time() - start_time < duration_seconds:
-        loop_start = time.time()
-        func(*args, **kwargs)
-        elapsed = time.time() - loop_start
-        sleep_time = max(0, interval - elapsed)
-        time.sleep(sleep_time)
+    scheduler = PeriodicScheduler(rate_hz)
+    return scheduler.run(func, duration_seconds, None, *args, **kwargs)
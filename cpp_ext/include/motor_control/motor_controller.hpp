@@ -11,16 +11,124 @@
 #include <cstring>
 #include <fcntl.h>
 #include <unistd.h>
+#include <atomic>
+#include <chrono>
+#include <condition_variable>
+#include <functional>
+#include <memory>
+#include <mutex>
+#include <thread>
+#include <string>
+#include <unordered_map>
+#include <vector>
+
+class MotorController;
+
+// Handle to a move running on its own native thread; every method is safe to call without the GIL
+class MotionHandle {
+public:
+    enum class State { Running, Completed, Cancelled, TimedOut };
+
+    ~MotionHandle();                    // Cancels and joins a move that is still running
+    bool wait(double timeout_s = -1.0); // True once the move has finished, timeout < 0 waits forever
+    void cancel();
+    State state() const { return current_state.load(); }
+    bool done() const { return current_state.load() != State::Running; }
+    double elapsed() const;             // Seconds since the move started (frozen once finished)
+    uint64_t ticks() const { return tick_count.load(); }
+    uint64_t missedDeadlines() const { return missed_count.load(); }
+
+private:
+    friend class MotorController;
+    void finish(State final_state);
+
+    std::thread worker;
+    std::atomic<State> current_state{State::Running};
+    std::atomic<bool> cancel_requested{false};
+    std::atomic<uint64_t> tick_count{0};
+    std::atomic<uint64_t> missed_count{0};
+    std::chrono::steady_clock::time_point started;
+    std::chrono::steady_clock::time_point finished;
+    mutable std::mutex state_mutex;
+    std::condition_variable state_changed;
+};
 
 class MotorController {
 public:
     explicit MotorController(int can_id);  // Constructor with CAN ID
+    ~MotorController();                    // Stops any background move
     void init();                           // Initialize the motor config
     void setSpeed(double dutyCycle);       // Set motor output [-1.0, 1.0]
     void run(double speed, int duration_ms); // Set speed and feed enable
 
+    // Drive at speed for duration_s on a native thread, feeding enable at rate_hz.
+    // ramp_s > 0 ramps the duty up and down linearly (trapezoidal profile).
+    std::shared_ptr<MotionHandle> startMove(double speed, double duration_s, double rate_hz = 200.0,
+                                            int feed_ms = 50, double ramp_s = 0.0);
+    void stop();                           // Cancel the active move and set neutral output
+
+    // Closed-loop control on the quadrature encoder (sensor units = encoder ticks)
+    void setPosition(double ticks);        // Position PID (slot 0 gains from init)
+    void setMotionMagic(double ticks);     // Position with the configured cruise velocity / acceleration
+    void configureMotionMagic(double cruise_ticks_per_100ms, double accel_ticks_per_100ms_per_s, int timeout_ms = 100);
+    double getPosition();                  // Selected sensor position in ticks
+    double getVelocity();                  // Selected sensor velocity in ticks / 100 ms
+    double getClosedLoopError();
+    void zeroPosition(double ticks = 0.0);
+
+    // Drive to target_ticks on a native thread; completes once within tolerance_ticks
+    // (and below settle_velocity), times out after timeout_s
+    std::shared_ptr<MotionHandle> startPositionMove(double target_ticks, double tolerance_ticks, double timeout_s,
+                                                    bool motion_magic = true, double settle_velocity = 5.0,
+                                                    double rate_hz = 200.0, int feed_ms = 50);
+
+    // Play a profile sampled every dt_s on a native thread, feeding enable each tick. Closed-loop samples are
+    // position setpoints in ticks (position PID), open-loop samples are duty cycles. A closed-loop profile then
+    // holds its last setpoint until within tolerance_ticks (and below settle_velocity), or times out after
+    // settle_timeout_s.
+    std::shared_ptr<MotionHandle> startProfile(std::vector<double> samples, double dt_s, bool closed_loop,
+                                               double tolerance_ticks = 0.0, double settle_timeout_s = 1.0,
+                                               double settle_velocity = 5.0, int feed_ms = 50);
+
 private:
+    std::shared_ptr<MotionHandle> launch(std::shared_ptr<MotionHandle> handle, std::function<void(MotionHandle*)> loop);
+
     TalonSRX motor;
+    std::mutex move_mutex;
+    std::shared_ptr<MotionHandle> active_move;
+};
+
+// One raw CAN socket bound to an interface, kept open for the life of the process
+class CanSocket {
+public:
+    explicit CanSocket(const std::string& ifname);  // Opens and binds, throws std::runtime_error on failure
+    ~CanSocket();
+    CanSocket(const CanSocket&) = delete;
+    CanSocket& operator=(const CanSocket&) = delete;
+
+    void send(const struct can_frame& frame);                   // One write on the bound fd
+    // sendmmsg; returns frames written, which is fewer than requested if the TX queue fills part-way (callers must
+    // check), and throws if not a single frame could be sent
+    size_t sendBatch(const std::vector<struct can_frame>& frames);
+    const std::string& interfaceName() const { return ifname; }
+
+private:
+    std::string ifname;
+    int sock;
+    std::mutex write_mutex;
+};
+
+// Process-wide cache of bound sockets, one per interface name
+class CanSocketPool {
+public:
+    static CanSocketPool& instance();
+    std::shared_ptr<CanSocket> get(const std::string& ifname);
+    void closeAll();
+
+private:
+    std::mutex mutex;
+    std::unordered_map<std::string, std::shared_ptr<CanSocket>> sockets;
 };
 
+struct can_frame makeCanFrame(canid_t can_id, const uint8_t* data, size_t len, bool extended = false);
 void sendCanFrame(const std::string& ifname, canid_t can_id, uint8_t data[8], uint8_t dlc);
@@ -1,12 +1,80 @@
 #include <pybind11/pybind11.h>
+#include <pybind11/stl.h>
 #include "motor_control/motor_controller.hpp"
 
 namespace py = pybind11;
 
+static struct can_frame frameFromPython(canid_t can_id, const py::bytes& data, bool extended) {
+    std::string payload = data;
+    return makeCanFrame(can_id, reinterpret_cast<const uint8_t*>(payload.data()), payload.size(), extended);
+}
+
 PYBIND11_MODULE(motor_cpp, m) {
+    py::class_<MotionHandle, std::shared_ptr<MotionHandle>> handle(m, "MotionHandle");
+    py::enum_<MotionHandle::State>(handle, "State")
+        .value("RUNNING", MotionHandle::State::Running)
+        .value("COMPLETED", MotionHandle::State::Completed)
+        .value("CANCELLED", MotionHandle::State::Cancelled)
+        .value("TIMED_OUT", MotionHandle::State::TimedOut);
+    handle
+        .def("wait", &MotionHandle::wait, py::arg("timeout") = -1.0, py::call_guard<py::gil_scoped_release>())
+        .def("cancel", &MotionHandle::cancel)
+        .def_property_readonly("state", &MotionHandle::state)
+        .def_property_readonly("done", &MotionHandle::done)
+        .def_property_readonly("elapsed", &MotionHandle::elapsed)
+        .def_property_readonly("ticks", &MotionHandle::ticks)
+        .def_property_readonly("missed_deadlines", &MotionHandle::missedDeadlines);
+
     py::class_<MotorController>(m, "MotorController")
         .def(py::init<int>(), py::arg("can_id"))
-        .def("init", &MotorController::init)
+        .def("init", &MotorController::init, py::call_guard<py::gil_scoped_release>())
         .def("set_speed", &MotorController::setSpeed, py::arg("duty_cycle"))
-        .def("run", &MotorController::run, py::arg("speed"), py::arg("duration_ms"));
+        .def("run", &MotorController::run, py::arg("speed"), py::arg("duration_ms"))
+        // The handle keeps the controller alive while Python still holds it
+        .def("start_move", &MotorController::startMove,
+             py::arg("speed"), py::arg("duration_s"), py::arg("rate_hz") = 200.0,
+             py::arg("feed_ms") = 50, py::arg("ramp_s") = 0.0,
+             py::call_guard<py::gil_scoped_release>(), py::keep_alive<0, 1>())
+        .def("stop", &MotorController::stop, py::call_guard<py::gil_scoped_release>())
+        .def("set_position", &MotorController::setPosition, py::arg("ticks"))
+        .def("set_motion_magic", &MotorController::setMotionMagic, py::arg("ticks"))
+        .def("configure_motion_magic", &MotorController::configureMotionMagic,
+             py::arg("cruise_ticks_per_100ms"), py::arg("accel_ticks_per_100ms_per_s"), py::arg("timeout_ms") = 100)
+        .def("get_position", &MotorController::getPosition)
+        .def("get_velocity", &MotorController::getVelocity)
+        .def("get_closed_loop_error", &MotorController::getClosedLoopError)
+        .def("zero_position", &MotorController::zeroPosition, py::arg("ticks") = 0.0)
+        .def("start_position_move", &MotorController::startPositionMove,
+             py::arg("target_ticks"), py::arg("tolerance_ticks"), py::arg("timeout_s"),
+             py::arg("motion_magic") = true, py::arg("settle_velocity") = 5.0,
+             py::arg("rate_hz") = 200.0, py::arg("feed_ms") = 50,
+             py::call_guard<py::gil_scoped_release>(), py::keep_alive<0, 1>())
+        .def("start_profile", &MotorController::startProfile,
+             py::arg("samples"), py::arg("dt_s"), py::arg("closed_loop"), py::arg("tolerance_ticks") = 0.0,
+             py::arg("settle_timeout_s") = 1.0, py::arg("settle_velocity") = 5.0, py::arg("feed_ms") = 50,
+             py::call_guard<py::gil_scoped_release>(), py::keep_alive<0, 1>());
+
+    // Constructing a CanSocket hands back the pooled socket for that interface
+    py::class_<CanSocket, std::shared_ptr<CanSocket>>(m, "CanSocket")
+        .def(py::init([](const std::string& ifname) { return CanSocketPool::instance().get(ifname); }),
+             py::arg("ifname") = "can0")
+        .def_property_readonly("interface", &CanSocket::interfaceName)
+        .def("send", [](CanSocket& self, canid_t can_id, const py::bytes& data, bool extended) {
+                 struct can_frame frame = frameFromPython(can_id, data, extended);
+                 py::gil_scoped_release release;
+                 self.send(frame);
+             },
+             py::arg("can_id"), py::arg("data"), py::arg("extended") = false)
+        .def("send_batch", [](CanSocket& self, const std::vector<std::pair<canid_t, py::bytes>>& frames, bool extended) {
+                 std::vector<struct can_frame> batch;
+                 batch.reserve(frames.size());
+                 for (const auto& item : frames) {
+                     batch.push_back(frameFromPython(item.first, item.second, extended));
+                 }
+                 py::gil_scoped_release release;
+                 return self.sendBatch(batch);
+             },
+             py::arg("frames"), py::arg("extended") = false);
+
+    m.def("close_can_sockets", []() { CanSocketPool::instance().closeAll(); });
 }
@@ -11,50 +11,175 @@
 #include <cstring>
 #include <fcntl.h>
 #include <unistd.h>
+#include <cerrno>
+#include <cstdio>
+#include <stdexcept>
+#include <algorithm>
+#include <cmath>
+#include <sys/uio.h>
 
-void sendCanFrame(const std::string& ifname, canid_t can_id, uint8_t data[8], uint8_t dlc) {
+CanSocket::CanSocket(const std::string& ifname) : ifname(ifname), sock(-1) {
     struct ifreq ifr {};
     struct sockaddr_can addr {};
-    struct can_frame frame {};
-    
-    // Open a raw CAN socket
-    int sock = socket(PF_CAN, SOCK_RAW, CAN_RAW);
+
+    sock = socket(PF_CAN, SOCK_RAW, CAN_RAW);
     if (sock < 0) {
-        perror("Socket");
-        return;
+        throw std::runtime_error("socket(PF_CAN): " + std::string(std::strerror(errno)));
     }
 
-    std::strncpy(ifr.ifr_name, ifname.c_str(), IFNAMSIZ);
+    std::strncpy(ifr.ifr_name, ifname.c_str(), IFNAMSIZ - 1);
     if (ioctl(sock, SIOCGIFINDEX, &ifr) < 0) {
-        perror("ioctl");
+        int err = errno;
         close(sock);
-        return;
+        throw std::runtime_error("ioctl(SIOCGIFINDEX) on " + ifname + ": " + std::strerror(err));
     }
 
     addr.can_family = AF_CAN;
     addr.can_ifindex = ifr.ifr_ifindex;
 
     if (bind(sock, (struct sockaddr*)&addr, sizeof(addr)) < 0) {
-        perror("bind");
+        int err = errno;
+        close(sock);
+        throw std::runtime_error("bind on " + ifname + ": " + std::strerror(err));
+    }
+}
+
+CanSocket::~CanSocket() {
+    if (sock >= 0) {
         close(sock);
-        return;
     }
+}
+
+void CanSocket::send(const struct can_frame& frame) {
+    std::lock_guard<std::mutex> lock(write_mutex);
+    ssize_t written;
+    do {
+        written = write(sock, &frame, sizeof(frame));
+    } while (written < 0 && errno == EINTR);
+    if (written != sizeof(frame)) {
+        throw std::runtime_error("write on " + ifname + ": " + std::strerror(errno));
+    }
+}
 
-    frame.can_id = can_id;
-    frame.can_dlc = dlc;
-    std::memcpy(frame.data, data, dlc);
+size_t CanSocket::sendBatch(const std::vector<struct can_frame>& frames) {
+    if (frames.empty()) {
+        return 0;
+    }
 
-    if (write(sock, &frame, sizeof(frame)) != sizeof(frame)) {
-        perror("write");
+    std::vector<struct iovec> iovecs(frames.size());
+    std::vector<struct mmsghdr> msgs(frames.size());
+    for (size_t i = 0; i < frames.size(); ++i) {
+        iovecs[i].iov_base = const_cast<struct can_frame*>(&frames[i]);
+        iovecs[i].iov_len = sizeof(struct can_frame);
+        std::memset(&msgs[i], 0, sizeof(struct mmsghdr));
+        msgs[i].msg_hdr.msg_iov = &iovecs[i];
+        msgs[i].msg_hdr.msg_iovlen = 1;
     }
 
-    close(sock);
+    std::lock_guard<std::mutex> lock(write_mutex);
+    size_t sent = 0;
+    while (sent < frames.size()) {
+        int n = sendmmsg(sock, msgs.data() + sent, frames.size() - sent, 0);
+        if (n < 0) {
+            if (errno == EINTR) {
+                continue;
+            }
+            // Part of the batch is out: report how much (ENOBUFS means the TX queue filled up). Nothing out is an error.
+            if (sent > 0) {
+                break;
+            }
+            throw std::runtime_error("sendmmsg on " + ifname + ": " + std::strerror(errno));
+        }
+        sent += n;
+    }
+    return sent;
+}
+
+CanSocketPool& CanSocketPool::instance() {
+    static CanSocketPool pool;
+    return pool;
+}
+
+std::shared_ptr<CanSocket> CanSocketPool::get(const std::string& ifname) {
+    std::lock_guard<std::mutex> lock(mutex);
+    auto it = sockets.find(ifname);
+    if (it != sockets.end()) {
+        return it->second;
+    }
+    auto can_socket = std::make_shared<CanSocket>(ifname);
+    sockets.emplace(ifname, can_socket);
+    return can_socket;
 }
 
+void CanSocketPool::closeAll() {
+    // Sockets still referenced from Python stay open until those handles are dropped
+    std::lock_guard<std::mutex> lock(mutex);
+    sockets.clear();
+}
+
+struct can_frame makeCanFrame(canid_t can_id, const uint8_t* data, size_t len, bool extended) {
+    if (len > CAN_MAX_DLEN) {
+        throw std::invalid_argument("CAN frame payload is limited to 8 bytes");
+    }
+    struct can_frame frame {};
+    frame.can_id = extended ? (can_id & CAN_EFF_MASK) | CAN_EFF_FLAG : can_id;
+    frame.can_dlc = static_cast<uint8_t>(len);
+    std::memcpy(frame.data, data, len);
+    return frame;
+}
+
+void sendCanFrame(const std::string& ifname, canid_t can_id, uint8_t data[8], uint8_t dlc) {
+    try {
+        CanSocketPool::instance().get(ifname)->send(makeCanFrame(can_id, data, dlc));
+    } catch (const std::exception& e) {
+        std::fprintf(stderr, "sendCanFrame: %s\n", e.what());
+    }
+}
+
+
+MotionHandle::~MotionHandle() {
+    cancel();
+    if (worker.joinable()) {
+        worker.join();
+    }
+}
+
+bool MotionHandle::wait(double timeout_s) {
+    std::unique_lock<std::mutex> lock(state_mutex);
+    auto finished_pred = [this] { return done(); };
+    if (timeout_s < 0) {
+        state_changed.wait(lock, finished_pred);
+        return true;
+    }
+    return state_changed.wait_for(lock, std::chrono::duration<double>(timeout_s), finished_pred);
+}
+
+void MotionHandle::cancel() {
+    cancel_requested.store(true);
+}
+
+double MotionHandle::elapsed() const {
+    std::lock_guard<std::mutex> lock(state_mutex);
+    auto end = done() ? finished : std::chrono::steady_clock::now();
+    return std::chrono::duration<double>(end - started).count();
+}
+
+void MotionHandle::finish(State final_state) {
+    {
+        std::lock_guard<std::mutex> lock(state_mutex);
+        finished = std::chrono::steady_clock::now();
+        current_state.store(final_state);
+    }
+    state_changed.notify_all();
+}
 
 MotorController::MotorController(int can_id)
     : motor(can_id) {}
 
+MotorController::~MotorController() {
+    stop();
+}
+
 void MotorController::init() {
     // Sends a custom CAN frame (initialization kick)
     uint8_t zero_data[8] = {0};
@@ -80,3 +205,213 @@ void MotorController::run(double speed, int duration_ms) {
     setSpeed(speed);
     ctre::phoenix::unmanaged::Unmanaged::FeedEnable(duration_ms);
 }
+
+std::shared_ptr<MotionHandle> MotorController::launch(std::shared_ptr<MotionHandle> handle,
+                                                      std::function<void(MotionHandle*)> loop) {
+    std::lock_guard<std::mutex> lock(move_mutex);
+    if (active_move) {
+        active_move->cancel();
+        if (active_move->worker.joinable()) {
+            active_move->worker.join();
+        }
+    }
+
+    handle->started = std::chrono::steady_clock::now();
+    MotionHandle* h = handle.get();
+    handle->worker = std::thread([h, loop]() { loop(h); });
+    active_move = handle;
+    return handle;
+}
+
+std::shared_ptr<MotionHandle> MotorController::startMove(double speed, double duration_s, double rate_hz,
+                                                         int feed_ms, double ramp_s) {
+    if (rate_hz <= 0) {
+        throw std::invalid_argument("rate_hz must be positive");
+    }
+
+    return launch(std::make_shared<MotionHandle>(), [this, speed, duration_s, rate_hz, feed_ms, ramp_s](MotionHandle* h) {
+        using clock = std::chrono::steady_clock;
+        const auto period = std::chrono::duration_cast<clock::duration>(std::chrono::duration<double>(1.0 / rate_hz));
+        const auto start = h->started;
+        const auto end = start + std::chrono::duration_cast<clock::duration>(std::chrono::duration<double>(duration_s));
+        auto deadline = start;
+
+        while (!h->cancel_requested.load()) {
+            auto now = clock::now();
+            if (now >= end) {
+                break;
+            }
+
+            double duty = speed;
+            if (ramp_s > 0) {
+                double t = std::chrono::duration<double>(now - start).count();
+                double scale = std::min({1.0, t / ramp_s, (duration_s - t) / ramp_s});
+                duty = speed * std::max(scale, 0.0);
+            }
+            run(duty, feed_ms);
+            h->tick_count.fetch_add(1);
+
+            // Absolute deadlines: a late tick is counted and the schedule skips ahead instead of bunching up
+            deadline += period;
+            now = clock::now();
+            if (now > deadline) {
+                h->missed_count.fetch_add(1);
+                deadline = now;
+            }
+            std::this_thread::sleep_until(std::min(deadline, end));
+        }
+
+        setSpeed(0.0);
+        h->finish(h->cancel_requested.load() ? MotionHandle::State::Cancelled : MotionHandle::State::Completed);
+    });
+}
+
+std::shared_ptr<MotionHandle> MotorController::startPositionMove(double target_ticks, double tolerance_ticks,
+                                                                 double timeout_s, bool motion_magic,
+                                                                 double settle_velocity, double rate_hz, int feed_ms) {
+    if (rate_hz <= 0) {
+        throw std::invalid_argument("rate_hz must be positive");
+    }
+
+    return launch(std::make_shared<MotionHandle>(),
+                  [this, target_ticks, tolerance_ticks, timeout_s, motion_magic, settle_velocity, rate_hz, feed_ms](MotionHandle* h) {
+        using clock = std::chrono::steady_clock;
+        const auto period = std::chrono::duration_cast<clock::duration>(std::chrono::duration<double>(1.0 / rate_hz));
+        const auto end = h->started + std::chrono::duration_cast<clock::duration>(std::chrono::duration<double>(timeout_s));
+        const ControlMode mode = motion_magic ? ControlMode::MotionMagic : ControlMode::Position;
+        auto deadline = h->started;
+        MotionHandle::State result = MotionHandle::State::TimedOut;
+
+        while (!h->cancel_requested.load()) {
+            motor.Set(mode, target_ticks);
+            ctre::phoenix::unmanaged::Unmanaged::FeedEnable(feed_ms);
+            h->tick_count.fetch_add(1);
+
+            // Finish as soon as the encoder says we are there, not after a padded time estimate
+            if (std::abs(motor.GetSelectedSensorPosition(0) - target_ticks) <= tolerance_ticks &&
+                std::abs(motor.GetSelectedSensorVelocity(0)) <= settle_velocity) {
+                result = MotionHandle::State::Completed;
+                break;
+            }
+            if (clock::now() >= end) {
+                break;
+            }
+
+            deadline += period;
+            auto now = clock::now();
+            if (now > deadline) {
+                h->missed_count.fetch_add(1);
+                deadline = now;
+            }
+            std::this_thread::sleep_until(deadline);
+        }
+
+        setSpeed(0.0);
+        h->finish(h->cancel_requested.load() ? MotionHandle::State::Cancelled : result);
+    });
+}
+
+std::shared_ptr<MotionHandle> MotorController::startProfile(std::vector<double> samples, double dt_s, bool closed_loop,
+                                                            double tolerance_ticks, double settle_timeout_s,
+                                                            double settle_velocity, int feed_ms) {
+    if (dt_s <= 0) {
+        throw std::invalid_argument("dt_s must be positive");
+    }
+    if (samples.empty()) {
+        throw std::invalid_argument("profile has no samples");
+    }
+
+    return launch(std::make_shared<MotionHandle>(),
+                  [this, samples = std::move(samples), dt_s, closed_loop, tolerance_ticks, settle_timeout_s,
+                   settle_velocity, feed_ms](MotionHandle* h) {
+        using clock = std::chrono::steady_clock;
+        const auto period = std::chrono::duration_cast<clock::duration>(std::chrono::duration<double>(dt_s));
+        const size_t last = samples.size() - 1;
+        const double profile_s = dt_s * last;
+        auto deadline = h->started;
+        MotionHandle::State result = MotionHandle::State::Completed;
+
+        while (!h->cancel_requested.load()) {
+            // Sample by elapsed time, interpolated, so a late tick still commands the right point of the profile
+            double t = std::chrono::duration<double>(clock::now() - h->started).count();
+            double pos = std::min(t / dt_s, static_cast<double>(last));
+            size_t i = std::min(static_cast<size_t>(pos), last);
+            double value = i < last ? samples[i] + (pos - i) * (samples[i + 1] - samples[i]) : samples[last];
+            if (closed_loop) {
+                motor.Set(ControlMode::Position, value);
+            } else {
+                setSpeed(value);
+            }
+            ctre::phoenix::unmanaged::Unmanaged::FeedEnable(feed_ms);
+            h->tick_count.fetch_add(1);
+
+            if (t >= profile_s) {
+                if (!closed_loop) {
+                    break;
+                }
+                if (std::abs(motor.GetSelectedSensorPosition(0) - samples[last]) <= tolerance_ticks &&
+                    std::abs(motor.GetSelectedSensorVelocity(0)) <= settle_velocity) {
+                    break;
+                }
+                if (t >= profile_s + settle_timeout_s) {
+                    result = MotionHandle::State::TimedOut;
+                    break;
+                }
+            }
+
+            deadline += period;
+            auto now = clock::now();
+            if (now > deadline) {
+                h->missed_count.fetch_add(1);
+                deadline = now;
+            }
+            std::this_thread::sleep_until(deadline);
+        }
+
+        setSpeed(0.0);
+        h->finish(h->cancel_requested.load() ? MotionHandle::State::Cancelled : result);
+    });
+}
+
+void MotorController::setPosition(double ticks) {
+    motor.Set(ControlMode::Position, ticks);
+}
+
+void MotorController::setMotionMagic(double ticks) {
+    motor.Set(ControlMode::MotionMagic, ticks);
+}
+
+void MotorController::configureMotionMagic(double cruise_ticks_per_100ms, double accel_ticks_per_100ms_per_s,
+                                           int timeout_ms) {
+    motor.ConfigMotionCruiseVelocity(cruise_ticks_per_100ms, timeout_ms);
+    motor.ConfigMotionAcceleration(accel_ticks_per_100ms_per_s, timeout_ms);
+}
+
+double MotorController::getPosition() {
+    return motor.GetSelectedSensorPosition(0);
+}
+
+double MotorController::getVelocity() {
+    return motor.GetSelectedSensorVelocity(0);
+}
+
+double MotorController::getClosedLoopError() {
+    return motor.GetClosedLoopError(0);
+}
+
+void MotorController::zeroPosition(double ticks) {
+    motor.SetSelectedSensorPosition(ticks, 0, 100);
+}
+
+void MotorController::stop() {
+    std::lock_guard<std::mutex> lock(move_mutex);
+    if (active_move) {
+        active_move->cancel();
+        if (active_move->worker.joinable()) {
+            active_move->worker.join();
+        }
+        active_move.reset();
+    }
+    // Neutral output even when no move was running (the destructor relies on this)
+    setSpeed(0.0);
+}
@@ -1,7 +1,15 @@
+import sys
 import cv2
 import pygame
 import keyboard
 import numpy as np
+from pathlib import Path
+sys.path.append(str(Path(__file__).resolve().parent.parent))
+from auto_typing.utils.frame_source import FrameSource
+
+ACTIVE_COLOR = (144, 238, 144, 255)
+INACTIVE_COLOR = (255, 0, 0, 100)
+TEXT_CACHE_SIZE = 512
 
 class TypingGUI:
     def __init__(self, width, height):
@@ -10,30 +18,35 @@ class TypingGUI:
         pygame.display.set_caption("TypingGUI")
         self.font = pygame.font.SysFont(None, 24)
 
+        # Camera frames are uploaded into one persistent surface; it also restores what overlays covered
+        self._frame_surface = pygame.Surface((width, height)).convert()
+        self._rgb = np.empty((height, width, 3), np.uint8)
+        self._text_cache = {}
+        # Every arrow is rendered once per state, at its own bounding-box size, instead of on full-screen layers
+        self._arrows = {name: {active: self._polygon_sprite(points, ACTIVE_COLOR if active else INACTIVE_COLOR)
+                               for active in (True, False)}
+                        for name, points in self._arrow_points(width, height).items()}
+        self._roll_sprites = {roll: self._roll_sprite(width, height, roll) for roll in (1, -1, 0)}
+        self._dirty = []
+        self._prev_dirty = []
+
     def plot(self, frame, translation=None, rotation=None):
+        # frame=None keeps the last camera frame and only refreshes the overlay regions
         tx, ty, tz = translation
         yaw, pitch, roll = rotation
 
-        frame = cv2.cvtColor(frame, cv2.COLOR_BGR2RGB)
-        frame = np.rot90(frame)
-        frame_surface = pygame.surfarray.make_surface(frame)
-        self.screen.blit(frame_surface, (0, 0))
-
+        new_frame = self._draw_frame(frame)
         self.draw_translation_arrows(tx, ty, tz)
         self.draw_rotation_arrows(pitch, yaw)
         self.draw_roll_arrow(roll)
 
-        pygame.display.update()
+        self._present(new_frame)
 
     def plot_with_labels(self, frame, translation=None, rotation=None, raw_translation=None, raw_rotation=None):
         tx, ty, tz = translation
         yaw, pitch, roll = rotation
 
-        frame = cv2.cvtColor(frame, cv2.COLOR_BGR2RGB)
-        frame = np.rot90(frame)
-        frame_surface = pygame.surfarray.make_surface(frame)
-        self.screen.blit(frame_surface, (0, 0))
-
+        new_frame = self._draw_frame(frame)
         self.draw_translation_arrows(tx, ty, tz)
         self.draw_rotation_arrows(pitch, yaw)
         self.draw_roll_arrow(roll)
@@ -51,13 +64,104 @@ class TypingGUI:
         self._draw_text(f"Yaw: {r_yaw:.2f}", width - 200, height - 100)
         self._draw_text(f"Roll: {r_roll:.2f}", width // 2 - 30, height // 2 - 90)
 
-        pygame.display.update()
+        self._present(new_frame)
+
+    def _draw_frame(self, frame):
+        if frame is None:
+            # Put back the camera pixels under last frame's overlays before drawing the new ones
+            for rect in self._prev_dirty:
+                self.screen.blit(self._frame_surface, rect, rect)
+            return False
+        width, height = self.screen.get_size()
+        if frame.shape[:2] != (height, width):
+            frame = cv2.resize(frame, (width, height))
+        cv2.cvtColor(frame, cv2.COLOR_BGR2RGB, dst=self._rgb)
+        # Same mirrored view as np.rot90, as a strided view instead of a copy
+        pygame.surfarray.blit_array(self._frame_surface, self._rgb.transpose(1, 0, 2)[::-1])
+        self.screen.blit(self._frame_surface, (0, 0))
+        return True
+
+    def _present(self, full):
+        if full:
+            pygame.display.update()
+        else:
+            pygame.display.update(self._prev_dirty + self._dirty)
+        self._prev_dirty, self._dirty = self._dirty, []
+
+    def _blit(self, sprite):
+        surface, pos = sprite
+        self._dirty.append(self.screen.blit(surface, pos))
+
+    def _text_sprites(self, text):
+        sprites = self._text_cache.get(text)
+        if sprites is None:
+            if len(self._text_cache) >= TEXT_CACHE_SIZE:
+                self._text_cache.clear()
+            sprites = self._text_cache[text] = (self.font.render(text, True, (0, 0, 0)),
+                                                self.font.render(text, True, (255, 255, 255)))
+        return sprites
 
     def _draw_text(self, text, x, y):
-        shadow = self.font.render(text, True, (0, 0, 0))
-        self.screen.blit(shadow, (x + 1, y + 1))
-        label = self.font.render(text, True, (255, 255, 255))
-        self.screen.blit(label, (x, y))
+        shadow, label = self._text_sprites(text)
+        self._blit((shadow, (x + 1, y + 1)))
+        self._blit((label, (x, y)))
+
+    @staticmethod
+    def _polygon_sprite(points, color):
+        xs, ys = [p[0] for p in points], [p[1] for p in points]
+        x0, y0 = min(xs), min(ys)
+        surface = pygame.Surface((max(xs) - x0 + 1, max(ys) - y0 + 1), pygame.SRCALPHA)
+        pygame.draw.polygon(surface, color, [(x - x0, y - y0) for x, y in points])
+        return surface, (x0, y0)
+
+    @staticmethod
+    def _arrow_points(width, height):
+        size = 20
+        base_left_x, base_left_y = 60, height - 60
+        base_center_x = width // 2
+        base_center_y = height - 60
+        base_right_x, base_right_y = width - 60, height - 60
+        return {
+            'left':  [(base_left_x - 2*size, base_left_y), (base_left_x - size, base_left_y - size), (base_left_x - size, base_left_y + size)],
+            'right': [(base_left_x + 2*size, base_left_y), (base_left_x + size, base_left_y - size), (base_left_x + size, base_left_y + size)],
+            'up':    [(base_left_x, base_left_y - 2*size), (base_left_x - size, base_left_y - size), (base_left_x + size, base_left_y - size)],
+            'down':  [(base_left_x, base_left_y + 2*size), (base_left_x - size, base_left_y + size), (base_left_x + size, base_left_y + size)],
+            'forward':  [(base_center_x, base_center_y - 2*size), (base_center_x - size, base_center_y - size), (base_center_x + size, base_center_y - size)],
+            'backward': [(base_center_x, base_center_y + 2*size), (base_center_x - size, base_center_y + size), (base_center_x + size, base_center_y + size)],
+            'pitch_up':   [(base_right_x, base_right_y - 2*size), (base_right_x - size, base_right_y - size), (base_right_x + size, base_right_y - size)],
+            'pitch_down': [(base_right_x, base_right_y + 2*size), (base_right_x - size, base_right_y + size), (base_right_x + size, base_right_y + size)],
+            'yaw_left':   [(base_right_x - 2*size, base_right_y), (base_right_x - size, base_right_y - size), (base_right_x - size, base_right_y + size)],
+            'yaw_right':  [(base_right_x + 2*size, base_right_y), (base_right_x + size, base_right_y - size), (base_right_x + size, base_right_y + size)],
+        }
+
+    @staticmethod
+    def _roll_sprite(width, height, roll):
+        center_x, center_y = width // 2, height // 2
+        radius = 60
+        arc_center = (center_x, center_y - 40)
+        if roll == 1:
+            start_angle = np.pi * 0.2
+            end_angle = np.pi
+            head_x = arc_center[0] - radius + 3
+        else:
+            start_angle = 0
+            end_angle = np.pi * 0.8
+            head_x = arc_center[0] + radius - 4
+        head_y = arc_center[1] + 5
+        color = ACTIVE_COLOR if roll != 0 else INACTIVE_COLOR
+
+        # Sprite covers the arc's circle plus room for the arrow head poking out on either side
+        margin = 12
+        x0, y0 = arc_center[0] - radius - margin, arc_center[1] - radius - margin
+        surface = pygame.Surface((2 * (radius + margin), 2 * (radius + margin)), pygame.SRCALPHA)
+        arc_rect = pygame.Rect(margin, margin, 2 * radius, 2 * radius)
+        pygame.draw.arc(surface, color, arc_rect, start_angle, end_angle, 6)
+
+        arrow_tip = (int(head_x) - x0, int(head_y) - y0)
+        left = (arrow_tip[0] - 10, arrow_tip[1] - 5)
+        right = (arrow_tip[0] + 10, arrow_tip[1] - 5)
+        pygame.draw.polygon(surface, color, [arrow_tip, left, right])
+        return surface, (x0, y0)
 
     def plot_from_raw_motion(self, frame, tx, ty, tz, yaw, pitch, roll):
         d_tx, d_ty, d_tz, d_yaw, d_pitch, d_roll = self.discretize_motion(tx, ty, tz, yaw, pitch, roll)
@@ -88,125 +192,61 @@ class TypingGUI:
 
     def draw_translation_arrows(self, tx, ty, tz):
         width, height = self.screen.get_size()
-        size = 20
-        base_left_x, base_left_y = 60, height - 60
-        base_center_x = width // 2
-        base_center_y = height - 60
-
         self._draw_text("Translation (Y/Z)", 20, height - 120)
-        self._draw_text("Translation (X)", base_center_x - 60, height - 120)
-
-        arrows = {
-            'left':  {'points': [(base_left_x - 2*size, base_left_y), (base_left_x - size, base_left_y - size), (base_left_x - size, base_left_y + size)], 'active': tz == 1},
-            'right': {'points': [(base_left_x + 2*size, base_left_y), (base_left_x + size, base_left_y - size), (base_left_x + size, base_left_y + size)], 'active': tz == -1},
-            'up':    {'points': [(base_left_x, base_left_y - 2*size), (base_left_x - size, base_left_y - size), (base_left_x + size, base_left_y - size)], 'active': ty == 1},
-            'down':  {'points': [(base_left_x, base_left_y + 2*size), (base_left_x - size, base_left_y + size), (base_left_x + size, base_left_y + size)], 'active': ty == -1},
-            'forward':  {'points': [(base_center_x, base_center_y - 2*size), (base_center_x - size, base_center_y - size), (base_center_x + size, base_center_y - size)], 'active': tx == 1},
-            'backward': {'points': [(base_center_x, base_center_y + 2*size), (base_center_x - size, base_center_y + size), (base_center_x + size, base_center_y + size)], 'active': tx == -1}
-        }
+        self._draw_text("Translation (X)", width // 2 - 60, height - 120)
 
-        for arrow in arrows.values():
-            color = (144, 238, 144) if arrow['active'] else (255, 0, 0)
-            alpha = 255 if arrow['active'] else 100
-            arrow_surface = pygame.Surface(self.screen.get_size(), pygame.SRCALPHA)
-            pygame.draw.polygon(arrow_surface, (*color, alpha), arrow['points'])
-            self.screen.blit(arrow_surface, (0, 0))
+        active = {'left': tz == 1, 'right': tz == -1, 'up': ty == 1, 'down': ty == -1,
+                  'forward': tx == 1, 'backward': tx == -1}
+        for name, is_active in active.items():
+            self._blit(self._arrows[name][is_active])
 
     def draw_rotation_arrows(self, pitch, yaw):
         width, height = self.screen.get_size()
-        size = 20
-        base_right_x, base_right_y = width - 60, height - 60
-
         self._draw_text("Rotation (Pitch/Yaw)", width - 200, height - 120)
 
-        arrows = {
-            'pitch_up':    {'points': [(base_right_x, base_right_y - 2*size), (base_right_x - size, base_right_y - size), (base_right_x + size, base_right_y - size)], 'active': pitch == 1},
-            'pitch_down':  {'points': [(base_right_x, base_right_y + 2*size), (base_right_x - size, base_right_y + size), (base_right_x + size, base_right_y + size)], 'active': pitch == -1},
-            'yaw_left':  {'points': [(base_right_x - 2*size, base_right_y), (base_right_x - size, base_right_y - size), (base_right_x - size, base_right_y + size)], 'active': yaw == 1},
-            'yaw_right': {'points': [(base_right_x + 2*size, base_right_y), (base_right_x + size, base_right_y - size), (base_right_x + size, base_right_y + size)], 'active': yaw == -1}
-        }
-
-        for arrow in arrows.values():
-            color = (144, 238, 144) if arrow['active'] else (255, 0, 0)
-            alpha = 255 if arrow['active'] else 100
-            arrow_surface = pygame.Surface(self.screen.get_size(), pygame.SRCALPHA)
-            pygame.draw.polygon(arrow_surface, (*color, alpha), arrow['points'])
-            self.screen.blit(arrow_surface, (0, 0))
+        active = {'pitch_up': pitch == 1, 'pitch_down': pitch == -1, 'yaw_left': yaw == 1, 'yaw_right': yaw == -1}
+        for name, is_active in active.items():
+            self._blit(self._arrows[name][is_active])
 
     def draw_roll_arrow(self, roll):
-        width, height = self.screen.get_size()
-        center_x, center_y = width // 2, height // 2
-        radius = 60
-        arc_surface = pygame.Surface((width, height), pygame.SRCALPHA)
-
-        if roll == 1:
-            start_angle = np.pi * 0.2
-            end_angle = np.pi
-            arc_center = (center_x, center_y - 40)
-            head_x = arc_center[0] - radius + 3
-        elif roll == -1:
-            start_angle = 0
-            end_angle = np.pi * 0.8
-            arc_center = (center_x, center_y - 40)
-            head_x = arc_center[0] + radius - 4
-        else:
-            start_angle = 0
-            end_angle = np.pi * 0.8
-            arc_center = (center_x, center_y - 40)
-            head_x = arc_center[0] + radius - 4
-
-        head_y = arc_center[1] + 5
-        is_active = roll != 0
-        color = (144, 238, 144) if is_active else (255, 0, 0)
-        alpha = 255 if is_active else 100
-
-        arc_rect = pygame.Rect(
-            arc_center[0] - radius,
-            arc_center[1] - radius,
-            2 * radius,
-            2 * radius
-        )
-
-        pygame.draw.arc(arc_surface, (*color, alpha), arc_rect, start_angle, end_angle, 6)
-
-        arrow_tip = (int(head_x), int(head_y))
-        left = (arrow_tip[0] - 10, arrow_tip[1] - 5)
-        right = (arrow_tip[0] + 10, arrow_tip[1] - 5)
-
-        pygame.draw.polygon(arc_surface, (*color, alpha), [arrow_tip, left, right])
-        self.screen.blit(arc_surface, (0, 0))
+        self._blit(self._roll_sprites[roll if roll in (1, -1) else 0])
 
 
 def main_manual():
-    cap = cv2.VideoCapture(0)
-    if not cap.isOpened():
-        print("Error: Could not open webcam.")
-        return
-
-    width = int(cap.get(cv2.CAP_PROP_FRAME_WIDTH))
-    height = int(cap.get(cv2.CAP_PROP_FRAME_HEIGHT))
-    gui = TypingGUI(width, height)
-
-    raw_tx = 0.8
-    raw_ty = -0.3
-    raw_tz = 0
-    raw_yaw = 0.5
-    raw_pitch = -1.2
-    raw_roll = 0
-
-    while True:
-        ret, frame = cap.read()
-        if not ret:
-            print("Error: Failed to grab frame.")
-            break
-
-        gui.plot_from_raw_motion(frame, raw_tx, raw_ty, raw_tz, raw_yaw, raw_pitch, raw_roll)
-
-        if keyboard.is_pressed('p'):
-            break
-
-    cap.release()
-    pygame.quit()
+    source = FrameSource(0)
+    try:
+        try:
+            source.start()
+            frame, _, _ = source.read()
+        except (RuntimeError, TimeoutError):
+            frame = None
+        if frame is None:
+            print("Error: Could not open webcam.")
+            return
+
+        width, height = source.frame_size
+        gui = TypingGUI(width, height)
+
+        raw_tx = 0.8
+        raw_ty = -0.3
+        raw_tz = 0
+        raw_yaw = 0.5
+        raw_pitch = -1.2
+        raw_roll = 0
+
+        while frame is not None:
+            gui.plot_from_raw_motion(frame, raw_tx, raw_ty, raw_tz, raw_yaw, raw_pitch, raw_roll)
+
+            if keyboard.is_pressed('p'):
+                break
+            try:
+                frame, _, _ = source.read(out=frame)
+            except TimeoutError:
+                # A late frame just repeats the last one; the buffer is only written on success
+                continue
+    finally:
+        source.stop()
+        pygame.quit()
 
 
 if __name__ == "__main__":
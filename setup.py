@@ -12,7 +12,6 @@ setup(
         'opencv-python',
         'PyYAML',
         'pytesseract',
-        'scikit-learn',
         'python-can',
     ],
     cmake_source_dir='cpp_ext',  # Points to your C++ extension
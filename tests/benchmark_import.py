@@ -0,0 +1,55 @@
+import sys
+import json
+import argparse
+import subprocess
+import numpy as np
+from pathlib import Path
+
+ROOT = Path(__file__).resolve().parent.parent
+DEFAULT_MODULES = [
+    'auto_typing.utils.config',
+    'auto_typing.phase1.ocr',
+    'auto_typing.phase1.localizer',
+    'auto_typing.phase1.tracker',
+]
+
+def import_time_us(module):
+    # Fresh interpreter per sample so nothing is already in sys.modules
+    proc = subprocess.run([sys.executable, '-X', 'importtime', '-c', f'import {module}'],
+                          cwd=ROOT, stdout=subprocess.PIPE, stderr=subprocess.PIPE, text=True)
+    if proc.returncode != 0:
+        raise RuntimeError(f"Importing {module} failed:\n{proc.stderr}")
+    total, packages = 0, {}
+    for line in proc.stderr.splitlines():
+        if not line.startswith('import time:') or 'cumulative' in line:
+            continue
+        _, cumulative, name = line.split('|')
+        # Top-level entries (no indentation) add up to the whole import
+        if not name[1:].startswith(' '):
+            total += int(cumulative)
+        package = name.strip().split('.')[0]
+        packages[package] = max(packages.get(package, 0), int(cumulative))
+    return total, packages
+
+if __name__ == "__main__":
+    parser = argparse.ArgumentParser(description='Cold import cost of auto_typing modules')
+    parser.add_argument('--modules', type=str, nargs='+', default=DEFAULT_MODULES)
+    parser.add_argument('--runs', type=int, default=5)
+    parser.add_argument('--output', type=str, help='Optional JSON file to append results to')
+    args = parser.parse_args()
+
+    results = {}
+    for module in args.modules:
+        samples = []
+        for _ in range(args.runs):
+            total, packages = import_time_us(module)
+            samples.append(total)
+        packages.pop('auto_typing', None)
+        heaviest = sorted(packages.items(), key=lambda item: -item[1])[:3]
+        results[module] = {'median_ms': float(np.median(samples)) / 1000.0, 'min_ms': min(samples) / 1000.0}
+        print(f"⏱ {module:<32} median {results[module]['median_ms']:7.1f} ms  min {results[module]['min_ms']:7.1f} ms  "
+              f"heaviest: {', '.join(f'{name} {us / 1000.0:.1f} ms' for name, us in heaviest)}")
+
+    if args.output:
+        with open(args.output, 'a') as f:
+            f.write(json.dumps({'python': sys.version.split()[0], 'results': results}) + '\n')
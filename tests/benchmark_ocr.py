@@ -0,0 +1,54 @@
+import sys
+import time
+import cv2
+import numpy as np
+import argparse
+from pathlib import Path
+
+sys.path.append(str(Path(__file__).resolve().parent.parent))
+from auto_typing.phase1.localizer import Phase1KeyboardLocalization
+from auto_typing.phase1.ocr import KeyOCR, OCRCache
+from auto_typing.utils.config import load_config, ROOT_DIR
+
+def benchmark_backend(localizer, images, backend, repeats, cache=None):
+    localizer.ocr = KeyOCR(backend=backend, workers=localizer.config['text'].get('ocr_workers', 4), cache=cache)
+    latencies = []
+    text_boxes = []
+    for _ in range(repeats):
+        for image in images:
+            start = time.perf_counter()
+            text_boxes.append(localizer.detect_text_regions(image))
+            latencies.append(time.perf_counter() - start)
+    localizer.ocr.close()
+    return np.array(latencies) * 1000.0, text_boxes
+
+if __name__ == "__main__":
+    parser = argparse.ArgumentParser(description='Per-frame OCR latency of detect_text_regions per backend')
+    parser.add_argument('--config', type=str, default='config.yaml')
+    parser.add_argument('--images', type=str, nargs='+', default=['captures/frame003.jpg', 'captures/frame004.jpg'])
+    parser.add_argument('--backends', type=str, nargs='+', default=list(KeyOCR.BACKENDS))
+    parser.add_argument('--repeats', type=int, default=3)
+    parser.add_argument('--cache', action='store_true', help='Also time each backend behind a fresh OCR cache')
+    args = parser.parse_args()
+
+    config = load_config(args.config)
+    images = [cv2.imread(str(ROOT_DIR / path), cv2.IMREAD_COLOR) for path in args.images]
+    if any(image is None for image in images):
+        raise FileNotFoundError(f"Missing input image(s): {args.images}")
+
+    localizer = Phase1KeyboardLocalization(config)
+
+    reference = None
+    for backend in args.backends:
+        latencies, text_boxes = benchmark_backend(localizer, images, backend, args.repeats)
+        if reference is None:
+            reference = text_boxes
+        matches = sum(a == b for a, b in zip(reference, text_boxes))
+        print(f"⏱ {backend:>9}: mean {latencies.mean():8.1f} ms  median {np.median(latencies):8.1f} ms  "
+              f"max {latencies.max():8.1f} ms  ({matches}/{len(text_boxes)} frames match {args.backends[0]})")
+        if args.cache:
+            cache = OCRCache()
+            latencies, _ = benchmark_backend(localizer, images, backend, args.repeats, cache=cache)
+            stats = cache.stats()
+            print(f"   + cache: mean {latencies.mean():8.1f} ms  median {np.median(latencies):8.1f} ms  "
+                  f"hits {stats['hits']} misses {stats['misses']} ({stats['hit_rate']:.0%})")
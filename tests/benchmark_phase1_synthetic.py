@@ -0,0 +1,175 @@
+import sys
+import cv2
+import json
+import time
+import argparse
+import platform
+import numpy as np
+from pathlib import Path
+from datetime import datetime
+sys.path.append(str(Path(__file__).resolve().parent.parent))
+from auto_typing.utils.config import load_config, ROOT_DIR
+from auto_typing.utils.profiler import format_summary
+from auto_typing.phase1.localizer import Phase1KeyboardLocalization
+from auto_typing.phase1.frame import FrameContext
+from auto_typing.phase1.plane import fit_plane_ransac
+from auto_typing.phase1.layout import KeyboardLayout, fit_layout_transform, project_key_positions
+from auto_typing.phase1.synthetic import random_scene
+
+def angle_deg(a, b):
+    a, b = np.asarray(a, np.float64), np.asarray(b, np.float64)
+    cos = abs(a @ b) / (np.linalg.norm(a) * np.linalg.norm(b))
+    return float(np.degrees(np.arccos(min(cos, 1.0))))
+
+def median_or_none(values):
+    values = [v for v in values if v is not None]
+    return float(np.median(values)) if values else None
+
+def run_scene(localizer, scene, index, use_ocr):
+    img1, img2 = scene.render(seed=index)
+    localizer.frame_id = index
+    K = localizer.camera_matrix
+    result = {'scene': index}
+
+    start = time.perf_counter()
+    frame1, frame2 = FrameContext(img1), FrameContext(img2)
+    pts, depths, depth_map = localizer.estimate_depth_from_flow(frame1, frame2, scene.camera_shift_m,
+                                                                return_depth_map=True)
+    text_boxes = localizer.detect_text_regions(frame1) if use_ocr else scene.key_boxes()
+    points_3d = localizer.compute_3d_points_from_text(text_boxes, depth_map)
+    try:
+        normal, _ = localizer.compute_keyboard_pose(localizer.fit_plane_svm(points_3d))
+    except ValueError:
+        normal = None
+    result['latency_ms'] = (time.perf_counter() - start) * 1000.0
+    result['pipeline_normal_error_deg'] = None if normal is None else angle_deg(normal, scene.normal)
+
+    # Flow depth against the true plane, and a plane fit over every tracked point
+    result['flow_points'] = int(len(depths))
+    if len(depths):
+        truth = scene.depth_at(pts)
+        result['depth_rel_error'] = float(np.median(np.abs(depths - truth) / truth))
+    else:
+        result['depth_rel_error'] = None
+    if len(depths) >= 3:
+        xyz = np.column_stack([(pts[:, 0] - K[0, 2]) * depths / K[0, 0], (pts[:, 1] - K[1, 2]) * depths / K[1, 1], depths])
+        try:
+            result['flow_normal_error_deg'] = angle_deg(fit_plane_ransac(xyz).normal, scene.normal)
+        except ValueError:
+            result['flow_normal_error_deg'] = None
+    else:
+        result['flow_normal_error_deg'] = None
+
+    # Key centers: recognized boxes directly, and every key through a layout homography fit on them
+    keys, centers = scene.key_centers()
+    # LK aliases onto the neighbouring keycap once the shift nears half the key pitch
+    gaps = np.linalg.norm(centers[:, None] - centers[None], axis=2) + np.eye(len(centers)) * 1e9
+    result['key_pitch_px'] = float(np.median(gaps.min(axis=1)))
+    result['max_disparity_px'] = float(K[0, 0] * abs(scene.camera_shift_m) / scene.depth_at(centers).min())
+    truth = dict(zip(keys, centers))
+    detections = [((x, y, w, h), char) for x, y, w, h, char in zip(text_boxes['left'], text_boxes['top'],
+                                                                     text_boxes['width'], text_boxes['height'],
+                                                                     text_boxes['text'])]
+    errors = [np.hypot(x + w / 2 - truth[c.lower()][0], y + h / 2 - truth[c.lower()][1])
+              for (x, y, w, h), c in detections if c.lower() in truth]
+    result['keys_found'] = len(errors)
+    result['key_center_error_px'] = float(np.mean(errors)) if errors else None
+    try:
+        matrix, _ = fit_layout_transform(detections, scene.key_positions, model='homography')
+        projected = project_key_positions(matrix, scene.key_positions)
+        result['layout_error_px'] = float(np.mean([np.hypot(*(np.array(projected[k]) - truth[k])) for k in keys]))
+    except ValueError:
+        result['layout_error_px'] = None
+    return result
+
+def summarize_scenes(results):
+    latency = np.array([r['latency_ms'] for r in results])
+    p50, p95, p99 = np.percentile(latency, [50, 95, 99])
+    return {
+        'scenes': len(results),
+        'throughput_fps': float(1000.0 / latency.mean()),
+        'latency_p50_ms': float(p50),
+        'latency_p95_ms': float(p95),
+        'latency_p99_ms': float(p99),
+        'pipeline_pose_rate': float(np.mean([r['pipeline_normal_error_deg'] is not None for r in results])),
+        'pipeline_normal_error_deg': median_or_none([r['pipeline_normal_error_deg'] for r in results]),
+        'flow_normal_error_deg': median_or_none([r['flow_normal_error_deg'] for r in results]),
+        'depth_rel_error': median_or_none([r['depth_rel_error'] for r in results]),
+        'key_center_error_px': median_or_none([r['key_center_error_px'] for r in results]),
+        'layout_error_px': median_or_none([r['layout_error_px'] for r in results]),
+    }
+
+def compare(summary, baseline_path):
+    baseline = json.loads(Path(baseline_path).read_text())['summary']
+    print(f"📊 Compared with {baseline_path}:")
+    for key, value in summary.items():
+        old = baseline.get(key)
+        if isinstance(value, float) and isinstance(old, float) and old != 0:
+            print(f"  {key:>26}: {old:10.3f} -> {value:10.3f} ({(value - old) / abs(old) * 100:+.1f}%)")
+
+if __name__ == "__main__":
+    parser = argparse.ArgumentParser(description='Offline Phase 1 benchmark on synthetic keyboard scenes')
+    parser.add_argument('--config', type=str, default='config.yaml')
+    parser.add_argument('--scenes', type=int, default=20)
+    parser.add_argument('--seed', type=int, default=0)
+    parser.add_argument('--translation', type=float, default=0.004,
+                        help='Camera shift between frames in meters (keep well below half a key pitch of disparity)')
+    parser.add_argument('--no-ocr', action='store_true', help='Use ground-truth key boxes instead of Tesseract')
+    parser.add_argument('--output', type=str, default=None, help='JSON results path (default: results dir)')
+    parser.add_argument('--compare', type=str, default=None, help='Earlier results JSON to diff against')
+    args = parser.parse_args()
+
+    config = load_config(args.config)
+    localizer = Phase1KeyboardLocalization(config)
+    image_size = localizer.camera.image_size or (1280, 720)
+    localizer.camera_matrix = localizer.camera.intrinsics(image_size)
+
+    use_ocr = not args.no_ocr
+    if use_ocr:
+        try:
+            localizer.ocr.warm_up()
+        except (ImportError, OSError) as e:
+            print(f"⚠️ Tesseract unavailable ({e}); using ground-truth key boxes.")
+            use_ocr = False
+    localizer.warm_up(image_size[::-1], ocr=False)
+    localizer.profiler.reset()
+
+    key_positions = KeyboardLayout.from_config(config).to_dict()
+    rng = np.random.default_rng(args.seed)
+    results = []
+    for i in range(args.scenes):
+        scene = random_scene(localizer.camera_matrix, image_size, rng, camera_shift_m=args.translation,
+                             key_positions=key_positions)
+        results.append(run_scene(localizer, scene, i, use_ocr))
+    localizer.close()
+
+    summary = summarize_scenes(results)
+    aliased = sum(r['max_disparity_px'] > r['key_pitch_px'] / 2 for r in results)
+    if aliased:
+        print(f"⚠️ {aliased}/{len(results)} scenes shift more than half a key pitch; flow tracks will alias. "
+              f"Lower --translation.")
+    stages = localizer.profiler.summary()
+    print(format_summary(stages))
+    for key, value in summary.items():
+        print(f"  {key:>26}: {'—' if value is None else f'{value:.3f}'}")
+
+    report = {
+        'created': datetime.now().isoformat(),
+        'environment': {'python': platform.python_version(), 'numpy': np.__version__, 'opencv': cv2.__version__,
+                        'machine': platform.machine(), 'processor': platform.processor()},
+        'settings': {'scenes': args.scenes, 'seed': args.seed, 'translation_m': args.translation,
+                     'image_size': list(image_size), 'ocr': use_ocr},
+        'summary': summary,
+        'stages': stages,
+        'scenes': results,
+    }
+    if args.output:
+        output = Path(args.output)
+    else:
+        output = ROOT_DIR / config['paths']['results_dir'] / f"benchmark_{datetime.now().strftime('%Y%m%d_%H%M%S')}.json"
+    output.parent.mkdir(parents=True, exist_ok=True)
+    output.write_text(json.dumps(report, indent=2))
+    print(f"🔽 Results saved to: {output}")
+
+    if args.compare:
+        compare(summary, args.compare)
@@ -0,0 +1,26 @@
+import sys
+import argparse
+from pathlib import Path
+sys.path.append(str(Path(__file__).resolve().parent.parent))
+from auto_typing.phase1.layout import KeyboardLayout
+from auto_typing.motor_control.planner import TypingPlanner
+from auto_typing.utils.config import load_config
+
+if __name__ == "__main__":
+    parser = argparse.ArgumentParser(description='Predicted typing time with and without pipelined key motions')
+    parser.add_argument('--config', type=str, default='config.yaml')
+    parser.add_argument('--text', type=str, default='flashdrum')
+    parser.add_argument('--start', type=float, default=None, help='Axis start position in mm (default: first key)')
+    args = parser.parse_args()
+
+    config = load_config(args.config)
+    planner = TypingPlanner.from_config(KeyboardLayout.from_config(config), config)
+    start = planner.targets(args.text[0])[0] if args.start is None else args.start
+
+    plan = planner.plan(args.text, start)
+    baseline = planner.stop_and_go_time(args.text, start)
+    for segment in plan.segments:
+        print(f"  {segment.key}: {segment.start_mm:7.1f} -> {segment.end_mm:7.1f} mm  "
+              f"v {segment.v_start:5.1f}/{segment.v_peak:5.1f}/{segment.v_end:5.1f} mm/s  {segment.duration:.3f} s")
+    print(f"⏱ stop-and-go: {baseline:.2f} s ({len(args.text) / baseline:.2f} chars/s)")
+    print(f"⏱ pipelined:   {plan.total_time:.2f} s ({plan.chars_per_second:.2f} chars/s)")
@@ -4,6 +4,9 @@ import os
 from pathlib import Path
 from auto_typing.utils.config import load_config, ROOT_DIR
 import argparse
+from datetime import datetime
+from auto_typing.utils.frame_source import FrameSource
+from auto_typing.utils.recording import FrameRecorder, RECORDING_SUFFIX
 
 def get_next_filename(capture_dir, base='frame', ext='jpg'):
     existing = sorted([f.name for f in capture_dir.glob(f'{base}*.{ext}')])
@@ -18,16 +21,21 @@ def capture_frames(config):
     capture_dir = ROOT_DIR / config['paths']['capture_dir']
     capture_dir.mkdir(parents=True, exist_ok=True)
 
-    cap = cv2.VideoCapture(0)
-    if not cap.isOpened():
+    try:
+        source = FrameSource.from_config(config).start()
+    except RuntimeError:
         print("❌ Failed to open camera.")
         return
 
     print("✅ Camera opened. Press SPACE to capture the first frame.")
     captured = 0
     while captured < 2:
-        ret, frame = cap.read()
-        if not ret:
+        try:
+            frame, _, _ = source.read()
+        except TimeoutError:
+            print("⚠️ No frame from camera yet, retrying.")
+            continue
+        if frame is None:
             print("❌ Failed to grab frame.")
             break
         cv2.imshow("Live Feed", frame)
@@ -45,13 +53,63 @@ def capture_frames(config):
             print("❌ Capture cancelled.")
             break
 
-    cap.release()
+    source.stop()
     cv2.destroyAllWindows()
 
+def record_session(config, max_frames=None, motor=None):
+    # Every frame goes into one raw .rec file (no JPEG encode), with the motor position when a motor is given
+    recording_dir = ROOT_DIR / config['paths']['recording_dir']
+    path = recording_dir / f"session_{datetime.now().strftime('%Y%m%d_%H%M%S')}{RECORDING_SUFFIX}"
+
+    try:
+        source = FrameSource.from_config(config)
+        source.drop_frames = False
+        source.start()
+    except RuntimeError:
+        print("❌ Failed to open camera.")
+        return
+
+    print("🔴 Recording. Press ESC to stop.")
+    recorder = None
+    try:
+        while max_frames is None or len(recorder or ()) < max_frames:
+            try:
+                frame, timestamp, frame_id = source.read()
+            except TimeoutError:
+                print("⚠️ No frame from camera yet, retrying.")
+                continue
+            if frame is None:
+                break
+            if recorder is None:
+                recorder = FrameRecorder(path, frame.shape,
+                                         capacity=config['capture'].get('recording_capacity', 65536))
+            position = motor.get_position() if motor is not None else float('nan')
+            recorder.append(frame, timestamp, frame_id, position_mm=position)
+            if len(recorder) == recorder.capacity:
+                print(f"⚠️ Recording is full ({recorder.capacity} frames); raise capture.recording_capacity "
+                      f"for longer sessions.")
+                break
+
+            cv2.imshow("Live Feed", frame)
+            if cv2.waitKey(1) == 27:
+                break
+    finally:
+        source.stop()
+        cv2.destroyAllWindows()
+        if recorder is not None:
+            print(f"🔽 Recorded {len(recorder)} frames to {path}")
+            recorder.close()
+    return path
+
 if __name__ == "__main__":
     parser = argparse.ArgumentParser(description='Capture stereo or sequence frames.')
     parser.add_argument('--config', type=str, default='config.yaml', help='Path to YAML config file')
+    parser.add_argument('--record', action='store_true', help='Record every frame to a .rec file instead')
+    parser.add_argument('--max-frames', type=int, default=None, help='Stop recording after this many frames')
     args = parser.parse_args()
 
     config = load_config(args.config)
-    capture_frames(config)
+    if args.record:
+        record_session(config, args.max_frames)
+    else:
+        capture_frames(config)
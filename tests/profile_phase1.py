@@ -0,0 +1,57 @@
+import sys
+import cv2
+import argparse
+from pathlib import Path
+sys.path.append(str(Path(__file__).resolve().parent.parent))
+from auto_typing.utils.config import load_config, ROOT_DIR
+from auto_typing.utils.profiler import summarize, format_summary
+from auto_typing.utils.run_log import read_records, stage_durations
+from auto_typing.phase1.localizer import Phase1KeyboardLocalization
+from auto_typing.phase1.frame import FrameContext
+
+def profile_phase1(config, img1, img2, translation_m, runs, capture=None, mode='cprofile'):
+    localizer = Phase1KeyboardLocalization(config)
+    localizer.warm_up(img1.shape[:2])
+    localizer.profiler.reset()
+    if capture:
+        localizer.profiler.capture(capture, mode)
+
+    for run in range(runs):
+        localizer.frame_id = run
+        frame1, frame2 = FrameContext(img1), FrameContext(img2)
+        _, _, depth_map = localizer.estimate_depth_from_flow(frame1, frame2, translation_m, return_depth_map=True)
+        text_boxes = localizer.detect_text_regions(frame1)
+        points_3d = localizer.compute_3d_points_from_text(text_boxes, depth_map)
+        try:
+            localizer.compute_keyboard_pose(localizer.fit_plane_svm(points_3d))
+        except ValueError as e:
+            if run == 0:
+                print(f"⚠️ No pose: {e}")
+    localizer.close()
+    return localizer.profiler
+
+if __name__ == "__main__":
+    parser = argparse.ArgumentParser(description='Per-stage timing of the Phase 1 pipeline')
+    parser.add_argument('--config', type=str, default='config.yaml')
+    parser.add_argument('--image1', type=str, default='captures/frame003.jpg')
+    parser.add_argument('--image2', type=str, default='captures/frame004.jpg')
+    parser.add_argument('--translation', type=float, default=0.01, help='Translation in meters')
+    parser.add_argument('--runs', type=int, default=20)
+    parser.add_argument('--capture', type=str, default=None, help='Stage to deep-profile, e.g. ocr or plane')
+    parser.add_argument('--mode', type=str, default='cprofile', choices=['cprofile', 'tracemalloc'])
+    parser.add_argument('--log', type=str, default=None, help='Summarize a recorded .jsonl run log instead')
+    args = parser.parse_args()
+
+    if args.log:
+        print(format_summary(summarize(stage_durations(read_records(args.log)))))
+    else:
+        config = load_config(args.config)
+        img1 = cv2.imread(str(ROOT_DIR / args.image1), cv2.IMREAD_COLOR)
+        img2 = cv2.imread(str(ROOT_DIR / args.image2), cv2.IMREAD_COLOR)
+        if img1 is None or img2 is None:
+            raise FileNotFoundError(f"Missing input image(s): {args.image1}, {args.image2}")
+        profiler = profile_phase1(config, img1, img2, args.translation, args.runs, args.capture, args.mode)
+        print(f"⏱ {args.runs} runs")
+        print(format_summary(profiler.summary()))
+        if args.capture:
+            print(profiler.capture_report())
@@ -0,0 +1,41 @@
+# Exercise the pooled CAN socket against a virtual CAN interface:
+#   sudo modprobe vcan
+#   sudo ip link add dev vcan0 type vcan && sudo ip link set up vcan0
+import time
+import argparse
+import can
+from auto_typing.motor_control import motor_cpp
+
+def check_single_frames(sock, bus, count):
+    start = time.perf_counter()
+    for i in range(count):
+        sock.send(0x123, bytes([i & 0xFF] * 8))
+    elapsed = time.perf_counter() - start
+
+    received = [bus.recv(timeout=1.0) for _ in range(count)]
+    assert all(msg is not None for msg in received), "Missing frames on the bus"
+    assert [msg.data[0] for msg in received] == [i & 0xFF for i in range(count)], "Frames out of order"
+    print(f"✅ send: {count} frames in {elapsed * 1000:.2f} ms ({elapsed / count * 1e6:.1f} us/frame)")
+
+def check_batch(sock, bus, count):
+    frames = [(0x02040000 | i, bytes([0x0F, 0, 0, 0, 0, 0, 0, i & 0xFF])) for i in range(count)]
+    start = time.perf_counter()
+    sent = sock.send_batch(frames, extended=True)
+    elapsed = time.perf_counter() - start
+
+    received = [bus.recv(timeout=1.0) for _ in range(sent)]
+    assert all(msg is not None and msg.is_extended_id for msg in received), "Missing or non-extended frames"
+    assert [msg.arbitration_id for msg in received] == [frame[0] for frame in frames[:sent]], "IDs do not match"
+    print(f"✅ send_batch: {sent}/{count} frames in {elapsed * 1000:.2f} ms ({elapsed / max(sent, 1) * 1e6:.1f} us/frame)")
+
+if __name__ == "__main__":
+    parser = argparse.ArgumentParser(description='Pooled CAN socket test on a vcan interface')
+    parser.add_argument('--interface', type=str, default='vcan0')
+    parser.add_argument('--count', type=int, default=64)
+    args = parser.parse_args()
+
+    with can.interface.Bus(args.interface, bustype='socketcan') as bus:
+        sock = motor_cpp.CanSocket(args.interface)
+        check_single_frames(sock, bus, args.count)
+        check_batch(sock, bus, args.count)
+    motor_cpp.close_can_sockets()
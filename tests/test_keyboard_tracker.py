@@ -0,0 +1,65 @@
+import sys
+import time
+import cv2
+import argparse
+from pathlib import Path
+sys.path.append(str(Path(__file__).resolve().parent.parent))
+from auto_typing.phase1.localizer import Phase1KeyboardLocalization
+from auto_typing.phase1.tracker import KeyboardTracker
+from auto_typing.utils.config import load_config, ROOT_DIR
+from auto_typing.utils.frame_source import FrameSource
+from auto_typing.utils.recording import FrameRecording
+
+def draw_boxes(image, text_boxes, color):
+    for x, y, w, h, char in zip(text_boxes['left'], text_boxes['top'], text_boxes['width'],
+                                text_boxes['height'], text_boxes['text']):
+        cv2.rectangle(image, (x, y), (x + w, y + h), color, 2)
+        cv2.putText(image, char, (x, y - 5), cv2.FONT_HERSHEY_SIMPLEX, 0.6, color, 2)
+    return image
+
+if __name__ == "__main__":
+    parser = argparse.ArgumentParser(description='Streaming keyboard tracking test')
+    parser.add_argument('--config', type=str, default='config.yaml')
+    parser.add_argument('--images', type=str, nargs='*', help='Image sequence to track instead of the webcam')
+    parser.add_argument('--recording', type=str, default=None, help='Replay a .rec session at full speed')
+    args = parser.parse_args()
+
+    config = load_config(args.config)
+    localizer = Phase1KeyboardLocalization(config)
+    tracker = KeyboardTracker.from_config(localizer, config)
+
+    if args.recording:
+        # Zero-copy views straight out of the mapped file
+        frames = (frame for frame, _ in FrameRecording(ROOT_DIR / args.recording))
+    elif args.images:
+        frames = (cv2.imread(str(ROOT_DIR / path), cv2.IMREAD_COLOR) for path in args.images)
+    else:
+        source = FrameSource.from_config(config).start()
+
+        def live_frames():
+            while True:
+                try:
+                    frame, _, _ = source.read()
+                except TimeoutError:
+                    continue
+                yield frame
+
+        frames = live_frames()
+
+    for frame in frames:
+        if frame is None:
+            break
+        start = time.perf_counter()
+        text_boxes = tracker.update(frame)
+        elapsed_ms = (time.perf_counter() - start) * 1000.0
+        kind = "🔑 keyframe" if tracker.is_keyframe else "➡️ tracked"
+        print(f"{kind} {tracker.frame_index}: {len(text_boxes['text'])} keys, "
+              f"confidence {tracker.confidence:.2f}, {elapsed_ms:.1f} ms")
+
+        if config['debug']['show_matches']:
+            color = (0, 0, 255) if tracker.is_keyframe else (0, 255, 0)
+            cv2.imshow("Keyboard Tracker", draw_boxes(frame.copy(), text_boxes, color))
+            if cv2.waitKey(0 if args.images or args.recording else 1) == 27:
+                break
+
+    cv2.destroyAllWindows()
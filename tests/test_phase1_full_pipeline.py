@@ -5,6 +5,7 @@ import argparse
 from pathlib import Path
 from auto_typing.utils.config import load_config, ROOT_DIR
 from auto_typing.phase1.localizer import Phase1KeyboardLocalization
+from auto_typing.phase1.frame import FrameContext
 from datetime import datetime
 
 def run_phase1_pipeline(config_path, img1_path, img2_path, translation_m):
@@ -18,22 +19,16 @@ def run_phase1_pipeline(config_path, img1_path, img2_path, translation_m):
         raise FileNotFoundError(f"Missing input image(s): {img1_path}, {img2_path}")
 
     localizer = Phase1KeyboardLocalization(config)
+    frame1, frame2 = FrameContext(img1), FrameContext(img2)
 
-    # Step 1: Estimate depth from optical flow
-    pts_2d, depths = localizer.estimate_depth_from_flow(img1, img2, translation_m)
+    # Step 1 + 2: Estimate depth from optical flow into a sparse depth map
+    pts_2d, depths, depth_map = localizer.estimate_depth_from_flow(frame1, frame2, translation_m, return_depth_map=True)
     if pts_2d.size == 0:
         print("❌ No valid optical flow correspondences.")
         return
 
-    # Step 2: Build a sparse depth map
-    depth_map = np.zeros(img1.shape[:2], dtype=np.float32)
-    for (x, y), z in zip(pts_2d, depths):
-        x, y = int(round(x)), int(round(y))
-        if 0 <= y < depth_map.shape[0] and 0 <= x < depth_map.shape[1]:
-            depth_map[y, x] = z
-
     # Step 3: Detect text regions
-    text_boxes = localizer.detect_text_regions(img1)
+    text_boxes = localizer.detect_text_regions(frame1)
 
     # Step 4: Compute 3D points from text regions
     points_3d = localizer.compute_3d_points_from_text(text_boxes, depth_map)
@@ -0,0 +1,34 @@
+import sys
+import argparse
+from pathlib import Path
+sys.path.append(str(Path(__file__).resolve().parent.parent))
+from auto_typing.utils.config import load_config
+from auto_typing.phase1.pipeline import VisionPipeline
+
+def print_stats(stats):
+    print(f"{'stage':>8} {'workers':>7} {'frames':>6} {'fps':>7} {'cores':>6} {'busy ms':>8} {'lat ms':>8} {'max ms':>8}")
+    for stage, s in stats.items():
+        print(f"{stage:>8} {s['workers']:>7} {s['frames']:>6} {s['fps']:>7.1f} {s['cores_busy']:>6.2f} "
+              f"{s['busy_ms_per_frame']:>8.1f} {s['latency_mean_ms']:>8.1f} {s['latency_max_ms']:>8.1f}")
+
+if __name__ == "__main__":
+    parser = argparse.ArgumentParser(description='Multi-process capture / OCR / pose pipeline test')
+    parser.add_argument('--config', type=str, default='config.yaml')
+    parser.add_argument('--source', type=str, default=None, help='Camera index, video file or image directory')
+    parser.add_argument('--frames', type=int, default=None, help='Stop after this many captured frames')
+    parser.add_argument('--workers', type=int, default=None, help='Override the number of OCR processes')
+    args = parser.parse_args()
+
+    config = load_config(args.config)
+    source = int(args.source) if args.source is not None and args.source.isdigit() else args.source
+    pipeline = VisionPipeline.from_config(config, source, max_frames=args.frames)
+    if args.workers is not None:
+        pipeline.detect_workers = args.workers
+        pipeline.slots = max(pipeline.slots, args.workers + 3)
+
+    with pipeline:
+        for result in pipeline.results():
+            normal = "—" if result['normal'] is None else ", ".join(f"{v:+.3f}" for v in result['normal'])
+            print(f"🖼 frame {result['frame_id']}: {result['keys']} keys, {result['points']} 3D points, "
+                  f"normal [{normal}], {result['latency_ms']:.1f} ms")
+    print_stats(pipeline.stats())